@@ -0,0 +1,20 @@
+from django.contrib import admin
+from .models import ArchivedRecord
+
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    list_display = ['source', 'source_id', 'natural_key', 'created_at', 'archived_at', 'payload_size']
+    list_filter = ['source']
+    search_fields = ['natural_key']
+    exclude = ['payload']
+
+    # The archive is read-only here; rows only enter it via archive_old_rows
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
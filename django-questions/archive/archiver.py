@@ -0,0 +1,136 @@
+"""
+Moving old rows out of the hot tables, and reading them back.
+
+`archive_rows` copies rows older than a cutoff into ArchivedRecord (in the
+separate 'archive' database, each row as compressed JSON), copies their
+files into ARCHIVE_MEDIA_ROOT, and only then deletes the hot rows and
+files. The two databases cannot share a transaction, so every step is
+safe to repeat: an interrupted run is finished by running it again.
+
+Archived rows come back as unsaved, read-only model instances with
+`is_archived = True`, and their files are served from ARCHIVE_MEDIA_URL.
+Because only rows older than every hot row are archived, listing hot rows
+newest first and then archived rows newest first keeps the overall order.
+"""
+
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedRecord
+
+# Archivable models: model label -> (timestamp field, file field, unique field)
+ARCHIVABLE = {
+    'notes.note': ('created_at', None, None),
+    'fileupload.uploadedfile': ('uploaded_at', 'file', None),
+    'projectsubmission.projectsubmission': ('uploaded_at', 'project_file', 'tu_registration_number'),
+}
+
+cold_storage = FileSystemStorage(
+    location=getattr(settings, 'ARCHIVE_MEDIA_ROOT', os.path.join(settings.BASE_DIR, 'cold_media')),
+    base_url=getattr(settings, 'ARCHIVE_MEDIA_URL', '/cold-media/'),
+)
+
+
+def source_label(model):
+    return f'{model._meta.app_label}.{model._meta.model_name}'
+
+
+def default_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+
+def archive_rows(model, cutoff=None, batch_size=500, dry_run=False):
+    """Move rows of `model` older than `cutoff` to the archive; return how many"""
+    source = source_label(model)
+    time_field, file_field, key_field = ARCHIVABLE[source]
+    rows = model.objects.filter(**{f'{time_field}__lt': cutoff or default_cutoff()}).order_by('pk')
+    if dry_run:
+        return rows.count()
+
+    archived = 0
+    while True:
+        batch = list(rows[:batch_size])
+        if not batch:
+            return archived
+
+        records = []
+        for instance in batch:
+            if file_field:
+                copy_to_cold(getattr(instance, file_field).name)
+            records.append(ArchivedRecord(
+                source=source,
+                source_id=instance.pk,
+                created_at=getattr(instance, time_field),
+                natural_key=getattr(instance, key_field) if key_field else '',
+                payload=ArchivedRecord.pack(instance),
+            ))
+        # Rows left behind by an interrupted run are already archived
+        ArchivedRecord.objects.bulk_create(records, ignore_conflicts=True)
+
+        with transaction.atomic():
+            model.objects.filter(pk__in=[instance.pk for instance in batch]).delete()
+        if file_field:
+            for instance in batch:
+                name = getattr(instance, file_field).name
+                if name and default_storage.exists(name):
+                    default_storage.delete(name)
+        archived += len(batch)
+
+
+def copy_to_cold(name):
+    if not name or cold_storage.exists(name) or not default_storage.exists(name):
+        return
+    destination = cold_storage.path(name)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.copy2(default_storage.path(name), destination)
+
+
+def unpack(record):
+    """Return an archived row as an instance whose files point at cold storage"""
+    instance = record.unpack()
+    _, file_field, _ = ARCHIVABLE[record.source]
+    if file_field:
+        getattr(instance, file_field).storage = cold_storage
+    return instance
+
+
+def archived(model, before_pk=None, limit=None):
+    """Archived rows of `model` as read-only instances, highest pk first"""
+    records = ArchivedRecord.objects.filter(source=source_label(model)).order_by('-source_id')
+    if before_pk is not None:
+        records = records.filter(source_id__lt=before_pk)
+    if limit is not None:
+        records = records[:limit]
+    return [unpack(record) for record in records]
+
+
+def get_archived(model, pk):
+    """Return one archived row of `model`, or None"""
+    record = ArchivedRecord.objects.filter(source=source_label(model), source_id=pk).first()
+    return unpack(record) if record else None
+
+
+def with_archived(rows, model, limit, before_pk=None):
+    """Hot `rows` (newest first) followed by the archived rows of `model`.
+
+    This is one keyset page of at most `limit` rows in descending pk order:
+    archived rows continue below the lowest hot pk on the page, or below
+    `before_pk` when the page holds no hot rows. The archive only grows, so
+    there is no unbounded variant; callers page through it with `before_pk`.
+    """
+    rows = list(rows)
+    if len(rows) >= limit:
+        return rows[:limit]
+    before_pk = min((row.pk for row in rows), default=before_pk)
+    return rows + archived(model, before_pk=before_pk, limit=limit - len(rows))
+
+
+def is_key_archived(model, key):
+    """Whether an archived row of `model` has this unique key"""
+    return ArchivedRecord.objects.filter(source=source_label(model), natural_key=key).exists()
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from archive.archiver import ARCHIVABLE, archive_rows, default_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Move notes, uploads and submissions older than ARCHIVE_AFTER_DAYS to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows to archive')
+
+    def handle(self, *args, days, batch_size, dry_run, **options):
+        cutoff = default_cutoff() if days is None else timezone.now() - timedelta(days=days)
+        for label in ARCHIVABLE:
+            model = apps.get_model(label)
+            count = archive_rows(model, cutoff, batch_size, dry_run)
+            verb = 'Would archive' if dry_run else 'Archived'
+            self.stdout.write(f'{verb} {count} {model._meta.verbose_name_plural} older than {cutoff:%Y-%m-%d}')
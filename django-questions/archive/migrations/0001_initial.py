@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('source_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('natural_key', models.CharField(blank=True, max_length=255)),
+                ('payload', models.BinaryField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'natural_key'], name='archive_source_key_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'source_id'), name='archive_source_id_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+import zlib
+
+from django.core import serializers
+from django.db import models
+
+
+class ArchivedRecord(models.Model):
+    """One row moved out of a hot table, stored compressed in the archive database"""
+    source = models.CharField(max_length=100)  # app_label.model_name
+    source_id = models.BigIntegerField()
+    # The row's own timestamp, e.g. Note.created_at
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    # The row's unique business key, if it has one, so uniqueness checks
+    # can include archived rows
+    natural_key = models.CharField(max_length=255, blank=True)
+    # zlib-compressed JSON from django.core.serializers
+    payload = models.BinaryField()
+
+    def __str__(self):
+        return f'{self.source} #{self.source_id}'
+
+    @staticmethod
+    def pack(instance):
+        return zlib.compress(serializers.serialize('json', [instance]).encode())
+
+    def unpack(self):
+        """Return the archived row as an unsaved model instance"""
+        data = zlib.decompress(bytes(self.payload)).decode()
+        [deserialized] = serializers.deserialize('json', data, ignorenonexistent=True)
+        instance = deserialized.object
+        instance.is_archived = True
+        return instance
+
+    def payload_size(self):
+        return len(self.payload)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'source_id'], name='archive_source_id_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'natural_key'], name='archive_source_key_idx'),
+        ]
@@ -0,0 +1,19 @@
+class ArchiveRouter:
+    """Keep the archive app in its own database, and only the archive app there"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'archive':
+            return 'archive'
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'archive':
+            return 'archive'
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'archive':
+            return db == 'archive'
+        if db == 'archive':
+            return False
+        return None
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.models import Note
+
+from .archiver import archive_rows, get_archived, with_archived
+from .models import ArchivedRecord
+
+
+class ArchiveRoundTripTests(TestCase):
+    databases = {'default', 'archive'}
+
+    def setUp(self):
+        self.old = [Note.objects.create(title=f'Old {n}', description=f'**note** {n}') for n in range(3)]
+        self.assertEqual(archive_rows(Note, cutoff=timezone.now() + timedelta(seconds=1)), 3)
+        self.new = [Note.objects.create(title=f'New {n}', description='text') for n in range(2)]
+
+    def test_archived_rows_leave_the_hot_table(self):
+        self.assertEqual(list(Note.objects.values_list('title', flat=True)), ['New 1', 'New 0'])
+        self.assertEqual(ArchivedRecord.objects.filter(source='notes.note').count(), 3)
+        # A repeated run finds nothing left to move
+        self.assertEqual(archive_rows(Note, cutoff=self.new[0].created_at), 0)
+
+    def test_archived_row_comes_back_unchanged(self):
+        note = get_archived(Note, self.old[1].id)
+        self.assertTrue(note.is_archived)
+        self.assertEqual((note.id, note.title, note.description), (self.old[1].id, 'Old 1', '**note** 1'))
+        self.assertEqual(note.description_html, self.old[1].description_html)
+        self.assertIsNone(get_archived(Note, self.new[0].id))
+
+    def test_with_archived_pages_through_hot_then_archived_rows(self):
+        pages, before = [], None
+        while True:
+            rows = Note.objects.all()
+            if before is not None:
+                rows = rows.filter(id__lt=before)
+            page = with_archived(rows[:2], Note, limit=2, before_pk=before)
+            if not page:
+                break
+            pages.append([note.title for note in page])
+            before = page[-1].id
+        self.assertEqual(pages, [['New 1', 'New 0'], ['Old 2', 'Old 1'], ['Old 0']])
+
+    def test_hot_rows_fill_the_page_without_reading_the_archive(self):
+        with self.assertNumQueries(0, using='archive'):
+            page = with_archived(list(Note.objects.all()), Note, limit=2)
+        self.assertEqual([note.title for note in page], ['New 1', 'New 0'])
+
+    def test_index_includes_archived_notes(self):
+        response = self.client.get(reverse('notes:index'), {'archived': '1'})
+        self.assertContains(response, 'Old 0')
+        self.assertContains(response, 'New 1')
@@ -31,15 +31,25 @@ INSTALLED_APPS = [
     'user',
     'fileupload',
     'projectsubmission',
-    'notes'
+    'notes',
+    'registration',
+    'archive',
+    'monitoring',
+    'ratelimit',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Before CSRF, so refused requests are not parsed (see ratelimit.middleware)
+    'ratelimit.middleware.RateLimitMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Opt-in per request (?profile=1), staff only
+    'monitoring.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -114,3 +124,104 @@ STATIC_URL = 'static/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+# Archival of old rows (archive app). Rows older than ARCHIVE_AFTER_DAYS
+# move, compressed, into the separate 'archive' database and their files
+# into ARCHIVE_MEDIA_ROOT; run `migrate --database=archive` once, then
+# `manage.py archive_old_rows` periodically.
+DATABASES['archive'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'archive.sqlite3',
+}
+DATABASE_ROUTERS = ['archive.routers.ArchiveRouter']
+
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_MEDIA_ROOT = os.path.join(BASE_DIR, 'cold_media')
+ARCHIVE_MEDIA_URL = '/cold-media/'
+
+
+# Addresses allowed to scrape /metrics without a staff login
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+
+# Request profiler (monitoring.middleware.ProfilerMiddleware): seconds
+# between stack samples, and how many recent profiles to keep
+PROFILER_INTERVAL = 0.001
+PROFILER_KEEP = 100
+
+
+# Password hashing pool for the async login and register views
+# (myauthapp.hashing); serve djtest.asgi:application to get the benefit.
+# When every worker is busy and HASHING_QUEUE_DEPTH more calls are
+# waiting, further logins get a 503 asking them to try again.
+HASHING_WORKERS = os.cpu_count() or 1
+HASHING_QUEUE_DEPTH = 4 * HASHING_WORKERS
+
+
+# Password hashers. The first hashes new passwords; hashes made by the
+# others, or at another cost, are rehashed when a student next logs in.
+# `manage.py calibrate_hashers` recommends PBKDF2_ITERATIONS for this
+# machine; None keeps Django's default, which is also the lowest allowed.
+# Only weaker hashes are rehashed, so lowering it never downgrades any.
+PBKDF2_ITERATIONS = None
+PASSWORD_HASHERS = [
+    'myauthapp.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
+# Session and flash message storage. In 'file' and 'locmem' modes sessions
+# are read from the 'sessions' cache and written through to the database
+# (Django's cached_db engine), and flash messages live in a signed cookie,
+# so most requests no longer touch the session table. 'file' shares the
+# cache between the processes of one host; 'locmem' is per process and only
+# safe with a single worker process, since other processes would keep
+# serving a session after it changed. 'db' is Django's default and keeps
+# sessions and messages as they were; set 'file' to opt in. Run
+# `manage.py purge_sessions` periodically to delete expired sessions.
+SESSION_STORAGE_MODE = 'db'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if SESSION_STORAGE_MODE in ('file', 'locmem'):
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'session_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    } if SESSION_STORAGE_MODE == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'sessions'
+    MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Rate limits (ratelimit app) per client and scope, as 'count/period' with
+# period s, m, h or d: each client may burst `count` requests, then gets
+# one more every period/count. RATE_LIMIT_CLIENT_RATES overrides scopes for
+# single addresses, e.g. a lab's NAT gateway. Set RATE_LIMIT_CLIENT_HEADER
+# (e.g. 'HTTP_X_FORWARDED_FOR') only behind a proxy that sets it.
+# 'memory' keeps the buckets per process, the least recently used evicted
+# past RATE_LIMIT_MAX_BUCKETS; use 'sqlite' to share them between several
+# worker processes through RATE_LIMIT_SQLITE_PATH.
+RATE_LIMITS = {
+    'login': '10/m',
+    'register': '5/h',
+    'registration': '5/h',
+    'upload': '20/h',
+    'project_upload': '5/h',
+}
+RATE_LIMIT_CLIENT_RATES = {}
+RATE_LIMIT_CLIENT_HEADER = None
+RATE_LIMIT_BACKEND = 'memory'
+RATE_LIMIT_MAX_BUCKETS = 10000
+RATE_LIMIT_SQLITE_PATH = BASE_DIR / 'ratelimit.sqlite3'
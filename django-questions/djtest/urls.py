@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from monitoring.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,8 +13,11 @@ urlpatterns = [
     path('project/', include('projectsubmission.urls')),
     path('notes/', include('notes.urls')),
     path('registration/', include('registration.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL,
                           document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.ARCHIVE_MEDIA_URL,
+                          document_root=settings.ARCHIVE_MEDIA_ROOT)
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fileupload', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedfile',
+            index=models.Index(fields=['uploaded_at'], name='uploadedfile_uploaded_at_idx'),
+        ),
+    ]
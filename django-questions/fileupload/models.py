@@ -7,3 +7,9 @@ class UploadedFile(models.Model):
 
     def __str__(self):
         return self.file.name
+
+    class Meta:
+        indexes = [
+            # Backs the newest-first listing on the success page
+            models.Index(fields=['uploaded_at'], name='uploadedfile_uploaded_at_idx'),
+        ]
@@ -1,9 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from archive.archiver import with_archived
+from ratelimit.decorators import rate_limit
 from .forms import FileUploadForm
 from .models import UploadedFile
 
 
+PAGE_SIZE = 50
+
+
+@rate_limit('upload')
 def upload_file(request):
     if request.method == 'POST':
         form = FileUploadForm(request.POST, request.FILES)
@@ -25,4 +31,22 @@ def upload_file(request):
 
 def upload_success(request):
     files = UploadedFile.objects.all().order_by('-uploaded_at')
-    return render(request, 'fileupload/success.html', {'files': files})
+    include_archived = request.GET.get('archived') == '1'
+    before = request.GET.get('before', '')
+    next_before = None
+    if include_archived:
+        # The archive can be far larger than the hot table, so with it the
+        # list is paged by id, like the notes index
+        files = files.order_by('-id')
+        if before.isdigit():
+            files = files.filter(id__lt=int(before))
+        files = with_archived(files[:PAGE_SIZE + 1], UploadedFile, limit=PAGE_SIZE + 1,
+                              before_pk=int(before) if before.isdigit() else None)
+        next_before = files[PAGE_SIZE - 1].id if len(files) > PAGE_SIZE else None
+        files = files[:PAGE_SIZE]
+    return render(request, 'fileupload/success.html', {
+        'files': files,
+        'next_before': next_before,
+        'is_first_page': not before,
+        'include_archived': include_archived,
+    })
@@ -0,0 +1,56 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'status_code', 'total_ms', 'sql_count',
+                    'sql_ms', 'template_ms', 'python_ms', 'user', 'stacks_link']
+    list_filter = ['view_name', 'status_code']
+    search_fields = ['path', 'view_name']
+    exclude = ['collapsed_stacks']
+
+    @admin.display(description='Total ms', ordering='total_seconds')
+    def total_ms(self, obj):
+        return round(obj.total_seconds * 1000, 1)
+
+    @admin.display(description='SQL ms', ordering='sql_seconds')
+    def sql_ms(self, obj):
+        return round(obj.sql_seconds * 1000, 1)
+
+    @admin.display(description='Template ms', ordering='template_seconds')
+    def template_ms(self, obj):
+        return round(obj.template_seconds * 1000, 1)
+
+    @admin.display(description='Python ms', ordering='python_seconds')
+    def python_ms(self, obj):
+        return round(obj.python_seconds * 1000, 1)
+
+    @admin.display(description='Flamegraph')
+    def stacks_link(self, obj):
+        url = reverse('admin:monitoring_requestprofile_stacks', args=[obj.id])
+        return format_html('<a href="{}">collapsed stacks</a>', url)
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/stacks/', self.admin_site.admin_view(self.stacks_view),
+                 name='monitoring_requestprofile_stacks'),
+        ] + super().get_urls()
+
+    def stacks_view(self, request, profile_id):
+        profile = self.get_object(request, profile_id)
+        if profile is None or not self.has_view_permission(request, profile):
+            return HttpResponse(status=404)
+        response = HttpResponse(profile.collapsed_stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.folded"'
+        return response
+
+    # Profiles are only created by ProfilerMiddleware
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,118 @@
+import sys
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from monitoring.queryplan import capture, explain, flagged_steps, index_name, suggest_index, view_urls
+
+MIGRATION_TEMPLATE = '''from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('{app_label}', '{previous}'),
+    ]
+
+    operations = [
+{operations}
+    ]
+'''
+
+OPERATION_TEMPLATE = '''        migrations.AddIndex(
+            model_name='{model_name}',
+            index=models.Index(fields={fields!r}, name='{name}'),
+        ),'''
+
+
+class Command(BaseCommand):
+    help = ('GET every view (or the given URLs), EXPLAIN QUERY PLAN its queries on SQLite, '
+            'flag full scans and temporary sorts and print migrations adding the missing indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='URLs to request instead of every view, e.g. /notes/?before=100')
+        parser.add_argument('--sample-id', type=int, default=1, help='Value for <int:...> URL parameters')
+        parser.add_argument('--check', action='store_true', help='Exit with status 1 if any index is suggested')
+
+    def handle(self, *args, urls, sample_id, check, **options):
+        vendors = {connections[alias].vendor for alias in connections}
+        if vendors != {'sqlite'}:
+            raise CommandError('advise_indexes reads EXPLAIN QUERY PLAN output and needs SQLite databases')
+
+        targets = [(url, url) for url in urls] or list(view_urls(sample_id))
+        suggestions = {}
+        query_count = flagged_count = 0
+
+        setup_test_environment()
+        try:
+            # Views may write (sessions, lazily rendered notes); undo all of it
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(transaction.atomic(using=alias))
+                client = Client(raise_request_exception=False)
+                for url, name in targets:
+                    response, queries = capture(client, url)
+                    query_count += len(queries)
+                    flagged_count += self.report(url, name, response, queries, suggestions, options['verbosity'])
+                for alias in connections:
+                    transaction.set_rollback(True, using=alias)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f'\nRequested {len(targets)} URLs: {query_count} distinct queries, {flagged_count} flagged.')
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found.'))
+            return
+
+        self.write_migrations(suggestions)
+        if check:
+            sys.exit(1)
+
+    def report(self, url, name, response, queries, suggestions, verbosity):
+        """Print the flagged queries of one URL; return how many there were"""
+        flagged_count = 0
+        lines = []
+        for alias, sql, params in queries:
+            plan = explain(alias, sql, params)
+            flagged = flagged_steps(sql, plan)
+            if not flagged and verbosity < 2:
+                continue
+            flagged_count += bool(flagged)
+            lines.append(f'  [{alias}] {sql}')
+            lines.extend(f'    {step}' for step in plan)
+
+            if not flagged:
+                continue
+            suggestion = suggest_index(alias, sql, flagged)
+            if suggestion is None:
+                lines.append(self.style.WARNING('    -> flagged, but no new index would help'))
+                continue
+            model, fields = suggestion
+            suggestions.setdefault(model._meta.app_label, {})[(model._meta.model_name, tuple(fields))] = model
+            lines.append(self.style.WARNING(f'    -> suggest an index on {model.__name__}({", ".join(fields)})'))
+
+        if lines:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{url} ({name}) -> {response.status_code}'))
+            self.stdout.write('\n'.join(lines))
+        return flagged_count
+
+    def write_migrations(self, suggestions):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            '\nSuggested migrations (add the same indexes to each model\'s Meta.indexes, '
+            'or makemigrations will want to remove them):'
+        ))
+        for app_label, indexes in suggestions.items():
+            leaves = loader.graph.leaf_nodes(app_label)
+            previous = leaves[0][1] if leaves else '0001_initial'
+            number = int(previous.split('_', 1)[0]) + 1 if previous[:4].isdigit() else 1
+            operations = '\n'.join(
+                OPERATION_TEMPLATE.format(model_name=model_name, fields=list(fields), name=index_name(model, fields))
+                for (model_name, fields), model in indexes.items()
+            )
+            self.stdout.write(f'\n# {app_label}/migrations/{number:04d}_add_suggested_indexes.py')
+            self.stdout.write(MIGRATION_TEMPLATE.format(app_label=app_label, previous=previous, operations=operations))
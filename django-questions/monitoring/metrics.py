@@ -0,0 +1,152 @@
+"""
+In-process request metrics with fixed-size storage.
+
+Every histogram has a fixed list of bucket bounds chosen up front, so
+recording a request is a bisect and a few integer increments, and memory
+only grows with the number of distinct URL names (a fixed set), never with
+traffic. Counts are per worker process; Prometheus scrapes and sums them
+per instance like any other multi-process exporter.
+
+Password hashing in myauthapp.hashing is recorded the same way, per
+operation: time waiting for a pool worker and time spent hashing.
+"""
+
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+HASHING_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One slot per bound plus the +Inf overflow slot
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+    def total(self):
+        return sum(self.counts)
+
+
+class ViewMetrics:
+    __slots__ = ('latency', 'queries', 'sql_time', 'size', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_time = Histogram(SQL_TIME_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = [0] * len(STATUS_CLASSES)
+
+
+class HashingMetrics:
+    __slots__ = ('wait', 'duration')
+
+    def __init__(self):
+        self.wait = Histogram(HASHING_BUCKETS)
+        self.duration = Histogram(HASHING_BUCKETS)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+        # Password hashing in myauthapp.hashing, by operation
+        self.hashing = {}
+        self.hashing_rejected = 0
+
+    def record(self, view, status, seconds, queries, sql_seconds, size):
+        with self._lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(queries)
+            metrics.sql_time.observe(sql_seconds)
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[min(max(status // 100, 1), 5) - 1] += 1
+
+    def record_hashing(self, operation, wait_seconds, seconds):
+        with self._lock:
+            metrics = self.hashing.get(operation)
+            if metrics is None:
+                metrics = self.hashing[operation] = HashingMetrics()
+            metrics.wait.observe(wait_seconds)
+            metrics.duration.observe(seconds)
+
+    def record_hashing_rejected(self):
+        with self._lock:
+            self.hashing_rejected += 1
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            views = sorted(self.views.items())
+            lines = []
+            for name, help_text, attribute in (
+                ('djtest_request_duration_seconds', 'Request latency by URL name', 'latency'),
+                ('djtest_request_queries', 'SQL queries per request by URL name', 'queries'),
+                ('djtest_request_sql_seconds', 'SQL time per request by URL name', 'sql_time'),
+                ('djtest_response_size_bytes', 'Response body size by URL name', 'size'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, metrics in views:
+                    lines.extend(histogram_lines(name, f'view="{escape_label(view)}"', getattr(metrics, attribute)))
+
+            lines.append('# HELP djtest_requests_total Requests by URL name and status class')
+            lines.append('# TYPE djtest_requests_total counter')
+            for view, metrics in views:
+                for status, count in zip(STATUS_CLASSES, metrics.statuses):
+                    if count:
+                        lines.append(
+                            f'djtest_requests_total{{view="{escape_label(view)}",status="{status}"}} {count}'
+                        )
+
+            operations = sorted(self.hashing.items())
+            for name, help_text, attribute in (
+                ('djtest_password_hash_wait_seconds', 'Time a password hash waited for a pool worker', 'wait'),
+                ('djtest_password_hash_seconds', 'Time spent hashing a password by operation', 'duration'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for operation, metrics in operations:
+                    lines.extend(histogram_lines(name, f'operation="{escape_label(operation)}"', getattr(metrics, attribute)))
+            lines.append('# HELP djtest_password_hash_rejected_total Hashes refused because the pool was saturated')
+            lines.append('# TYPE djtest_password_hash_rejected_total counter')
+            lines.append(f'djtest_password_hash_rejected_total {self.hashing_rejected}')
+        return '\n'.join(lines) + '\n'
+
+
+def histogram_lines(name, label, histogram):
+    for bound, count in histogram.cumulative():
+        yield f'{name}_bucket{{{label},le="{bound}"}} {count}'
+    yield f'{name}_sum{{{label}}} {histogram.sum}'
+    yield f'{name}_count{{{label}}} {histogram.total()}'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
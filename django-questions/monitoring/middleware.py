@@ -0,0 +1,153 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+from .models import RequestProfile
+from .profiler import SamplingProfiler
+
+
+class QueryTimer:
+    """execute_wrapper that counts and times the SQL run while it is installed"""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def install_wrapper(stack, wrapper):
+    """Add `wrapper` to every connection of this thread until `stack` closes"""
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and response size per URL name (see monitoring.metrics).
+
+    Works in both sync and async chains. Under ASGI, queries run through
+    sync_to_async in the request's own thread, so the timer is installed
+    there rather than on the event loop's connections.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            install_wrapper(stack, timer)
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(install_wrapper)(stack, timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def record(self, request, response, elapsed, timer):
+        match = request.resolver_match
+        # Unmatched URLs share one label so scanners cannot grow the registry
+        view = match.view_name if match else '<unresolved>'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        registry.record(view, response.status_code, elapsed, timer.count, timer.seconds, size)
+
+
+class ProfilerMiddleware:
+    """Profile a staff user's request when it asks with ?profile=1 or an X-Profile: 1 header.
+
+    Must come after AuthenticationMiddleware. The saved RequestProfile's id
+    is returned in an X-Profile-Id response header. Under ASGI the samples
+    are of the event loop thread, so they also catch other requests running
+    meanwhile, and work handed to other threads shows only as waiting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.wanted(request) or not request.user.is_staff:
+            return self.get_response(request)
+
+        profiler = SamplingProfiler()
+        with ExitStack() as stack:
+            install_wrapper(stack, profiler.execute_wrapper)
+            with profiler:
+                response = self.get_response(request)
+        self.save_profile(request, request.user, response, profiler)
+        return response
+
+    async def __acall__(self, request):
+        if not self.wanted(request) or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+
+        profiler = SamplingProfiler()
+        stack = ExitStack()
+        await sync_to_async(install_wrapper)(stack, profiler.execute_wrapper)
+        try:
+            with profiler:
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        await sync_to_async(self.save_profile)(request, await request.auser(), response, profiler)
+        return response
+
+    def wanted(self, request):
+        return request.GET.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+    def save_profile(self, request, user, response, profiler):
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=match.view_name if match else '',
+            status_code=response.status_code,
+            collapsed_stacks=profiler.collapsed(),
+            **profiler.summary(),
+        )
+        # Keep only the most recent profiles
+        keep = getattr(settings, 'PROFILER_KEEP', 100)
+        stale = RequestProfile.objects.values_list('id', flat=True)[keep:]
+        RequestProfile.objects.filter(id__in=list(stale)).delete()
+
+        response['X-Profile-Id'] = str(profile.id)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """One profiled request (see monitoring.profiler)"""
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    total_seconds = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    sql_seconds = models.FloatField()
+    template_seconds = models.FloatField()
+    python_seconds = models.FloatField()
+    sample_count = models.PositiveIntegerField()
+    # Collapsed stacks, readable by flamegraph.pl, speedscope, inferno, ...
+    collapsed_stacks = models.TextField()
+
+    def __str__(self):
+        return f'{self.method} {self.path} at {self.created_at}'
+
+    class Meta:
+        ordering = ['-created_at']
@@ -0,0 +1,116 @@
+"""
+Query budgets and N+1 detection for views.
+
+Decorate a view with @query_budget(n) to declare the most SQL queries one
+request to it may run, template rendering included. While
+QUERY_BUDGETS_ENABLED is on (it defaults to DEBUG; test cases switch it on
+with override_settings) every query the view runs is recorded, and when it
+returns two things are checked:
+
+- more than `n` queries in total;
+- the same statement, ignoring parameter values, run
+  QUERY_REPEAT_THRESHOLD times or more: the usual sign of a template loop
+  that queries once per row. It is reported with the stack of its first
+  repetition.
+
+Problems raise QueryBudgetExceeded, or are logged to the
+'monitoring.querybudget' logger when QUERY_BUDGET_ACTION is 'log'. When
+disabled, the decorator only costs a settings lookup per request.
+"""
+
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('monitoring.querybudget')
+
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def normalize(sql):
+    """Reduce a statement to its shape, so per-row variants compare equal"""
+    return NUMBER.sub('?', IN_LIST.sub('(%s, ...)', sql))
+
+
+def project_stack():
+    """The current stack, limited to this project's own source files"""
+    root = str(settings.BASE_DIR) + os.sep
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(root) and __file__ != frame.filename
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        shape = normalize(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == 2:
+            self.stacks[shape] = project_stack()
+        return execute(sql, params, many, context)
+
+    def problems(self, view_name, max_queries):
+        threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        problems = []
+        if self.count > max_queries:
+            problems.append(f'{view_name} ran {self.count} queries, over its budget of {max_queries}.')
+        for shape, count in self.shapes.most_common():
+            if count < threshold:
+                break
+            problems.append(
+                f'{view_name} ran this query {count} times (likely N+1):\n'
+                f'    {shape}\n'
+                f'first repeated at:\n{self.stacks[shape]}'
+            )
+        return problems
+
+
+def query_budget(max_queries):
+    """Declare the most queries one request to the decorated view may run"""
+
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'QUERY_BUDGETS_ENABLED', settings.DEBUG):
+                return view(request, *args, **kwargs)
+
+            recorder = QueryRecorder()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = view(request, *args, **kwargs)
+
+            problems = recorder.problems(view_name, max_queries)
+            if problems:
+                message = '\n'.join(problems)
+                if getattr(settings, 'QUERY_BUDGET_ACTION', 'raise') == 'log':
+                    logger.warning(message)
+                else:
+                    raise QueryBudgetExceeded(message)
+            return response
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
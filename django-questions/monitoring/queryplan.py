@@ -0,0 +1,197 @@
+"""
+Finding the queries SQLite answers with a full table scan or a temporary sort.
+
+`view_urls` lists the project's URLs, `capture` sends a GET to one through
+the test client and records its SELECT statements, and `explain` runs
+EXPLAIN QUERY PLAN on one of them. Two kinds of plan step are flagged:
+
+- `SCAN <table>` without an index: every row of the table is read;
+- `USE TEMP B-TREE FOR ORDER BY` (or GROUP BY / DISTINCT): the rows are
+  sorted for each query instead of being read in index order.
+
+For each flagged query `suggest_index` proposes an index on the columns
+compared for equality in the WHERE clause, followed by the ORDER BY
+columns (or else the first range-compared column), unless the table
+already has an index starting with those columns. Queries that filter
+nothing and sort by nothing cannot be helped by an index and only get
+flagged.
+"""
+
+import re
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.resolvers import RoutePattern
+
+from .querybudget import normalize
+
+# URL namespaces that are not worth exercising
+SKIP_NAMESPACES = {'admin'}
+
+CONVERTER = re.compile(r'<(?:(?P<converter>\w+):)?(?P<name>\w+)>')
+# Values used for path parameters; int parameters get the sample id
+SAMPLE_VALUES = {'str': 'sample', 'slug': 'sample', 'path': 'sample', 'uuid': '00000000-0000-0000-0000-000000000000'}
+
+PLAN_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?(?P<rest>.*)$')
+PLAN_TEMP_BTREE = re.compile(r'^USE TEMP B-TREE FOR (?P<purpose>.+)$')
+
+COLUMN = re.compile(r'"(?P<table>\w+)"\."(?P<column>\w+)"')
+TABLE = re.compile(r'\b(?:FROM|JOIN) "(?P<table>\w+)"')
+EQUALITY = re.compile(r'\s*(?:=|IN\b|IS\b)')
+RANGE = re.compile(r'\s*(?:<|>|BETWEEN\b)')
+CLAUSE_END = re.compile(r'\s(?:GROUP BY|ORDER BY|LIMIT|HAVING)\s')
+
+
+def view_urls(sample_id=1):
+    """Yield (url, view name) for every routable view outside SKIP_NAMESPACES"""
+    yield from _walk(get_resolver(), '', sample_id)
+
+
+def _walk(resolver, prefix, sample_id):
+    for entry in resolver.url_patterns:
+        if isinstance(entry, URLResolver):
+            if entry.namespace in SKIP_NAMESPACES or not isinstance(entry.pattern, RoutePattern):
+                continue
+            yield from _walk(entry, prefix + str(entry.pattern), sample_id)
+        elif isinstance(entry, URLPattern) and isinstance(entry.pattern, RoutePattern):
+            route = prefix + str(entry.pattern)
+            url = '/' + CONVERTER.sub(lambda match: sample_value(match, sample_id), route)
+            yield url, entry.name or entry.lookup_str
+
+
+def sample_value(match, sample_id):
+    return SAMPLE_VALUES.get(match.group('converter'), str(sample_id))
+
+
+class Capture:
+    """Record the SELECT statements sent while it is active"""
+
+    def __init__(self):
+        self.queries = []
+        self.seen = set()
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._recorder(alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def _recorder(self, alias):
+        def record(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                shape = (alias, normalize(sql))
+                if shape not in self.seen:
+                    self.seen.add(shape)
+                    self.queries.append((alias, sql, params))
+            return execute(sql, params, many, context)
+        return record
+
+
+def capture(client, url):
+    """GET `url`; return the response and its distinct (alias, sql, params)"""
+    with Capture() as recorder:
+        response = client.get(url)
+    return response, recorder.queries
+
+
+def explain(alias, sql, params):
+    """Return the detail column of EXPLAIN QUERY PLAN for one query"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def flagged_steps(sql, plan):
+    """Return the (step, table or None) pairs of a plan worth fixing"""
+    sorts = [step for step in plan if PLAN_TEMP_BTREE.match(step)]
+    flagged = []
+    for step in plan:
+        scan = PLAN_SCAN.match(step)
+        if not scan or scan.group('rest').strip() or scan.group('table') == 'CONSTANT':
+            continue
+        table = scan.group('table')
+        # Reading the first rows in table order and stopping at LIMIT is fine
+        if ' LIMIT ' in sql and not sorts and not filters_table(sql, table):
+            continue
+        flagged.append((step, table))
+    return flagged + [(step, None) for step in sorts]
+
+
+def clause(sql, keyword):
+    """The text of a top-level clause such as ' WHERE ', up to the next one"""
+    start = sql.find(keyword)
+    if start == -1:
+        return ''
+    rest = sql[start + len(keyword):]
+    end = CLAUSE_END.search(rest)
+    return rest[:end.start()] if end else rest
+
+
+def filters_table(sql, table):
+    return any(match.group('table') == table for match in COLUMN.finditer(clause(sql, ' WHERE ')))
+
+
+def index_columns(sql, table):
+    """Columns of `table` an index should cover for this query, in order"""
+    equality, ranges, ordering = [], [], []
+    where = clause(sql, ' WHERE ')
+    for match in COLUMN.finditer(where):
+        if match.group('table') != table:
+            continue
+        following = where[match.end():]
+        if EQUALITY.match(following):
+            equality.append(match.group('column'))
+        elif RANGE.match(following):
+            ranges.append(match.group('column'))
+    for match in COLUMN.finditer(clause(sql, ' ORDER BY ')):
+        if match.group('table') == table:
+            ordering.append(match.group('column'))
+
+    columns = []
+    for column in equality + (ordering or ranges[:1]):
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def tables_in(sql):
+    return list(dict.fromkeys(match.group('table') for match in TABLE.finditer(sql)))
+
+
+def existing_indexes(alias, table):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [constraint['columns'] for constraint in constraints.values() if constraint['columns']]
+
+
+def model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def suggest_index(alias, sql, flagged):
+    """Return (model, field names) for an index that removes the flagged steps, or None"""
+    tables = [table for _, table in flagged if table] or tables_in(sql)[:1]
+    for table in tables:
+        model = model_for_table(table)
+        columns = index_columns(sql, table)
+        if model is None or not columns:
+            continue
+        if any(existing[:len(columns)] == columns for existing in existing_indexes(alias, table)):
+            continue
+        fields = {field.column: field.name for field in model._meta.concrete_fields}
+        return model, [fields.get(column, column) for column in columns]
+    return None
+
+
+def index_name(model, fields):
+    # Index names are limited to 30 characters
+    return f'{model._meta.model_name}_{"_".join(fields)}'[:26].rstrip('_') + '_idx'
@@ -0,0 +1,80 @@
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from notes.models import Note
+from .metrics import registry
+from .middleware import MetricsMiddleware
+from .querybudget import QueryBudgetExceeded, normalize, query_budget
+
+
+@query_budget(10)
+def titles_one_query_per_row(request):
+    # The N+1 pattern: one extra query for every row of the list
+    titles = [Note.objects.get(id=note_id).title for note_id in Note.objects.values_list('id', flat=True)]
+    return HttpResponse(', '.join(titles))
+
+
+@query_budget(1)
+def titles_in_one_query(request):
+    return HttpResponse(', '.join(Note.objects.values_list('title', flat=True)))
+
+
+@override_settings(QUERY_BUDGETS_ENABLED=True, QUERY_REPEAT_THRESHOLD=5)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(6):
+            Note.objects.create(title=f'note {n}', description='text')
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_view_within_budget_passes(self):
+        response = titles_in_one_query(self.request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_query_is_reported_with_stack(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            titles_one_query_per_row(self.request)
+        message = str(raised.exception)
+        self.assertIn('6 times (likely N+1)', message)
+        self.assertIn('titles_one_query_per_row', message)
+        self.assertIn('monitoring/tests.py', message)
+
+    @override_settings(QUERY_REPEAT_THRESHOLD=100)
+    def test_over_budget_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'ran 7 queries, over its budget of 6'):
+            query_budget(6)(titles_one_query_per_row)(self.request)
+
+    @override_settings(QUERY_BUDGET_ACTION='log')
+    def test_log_action_logs_instead_of_raising(self):
+        with self.assertLogs('monitoring.querybudget', 'WARNING'):
+            response = titles_one_query_per_row(self.request)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGETS_ENABLED=False)
+    def test_disabled_budgets_do_not_check(self):
+        response = titles_one_query_per_row(self.request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_normalize_ignores_parameter_values(self):
+        self.assertEqual(
+            normalize('SELECT 1 FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            normalize('SELECT 1 FROM t WHERE id IN (%s, %s, %s) LIMIT 5'),
+        )
+
+
+class MetricsMiddlewareTests(TestCase):
+    async def test_async_chain_stays_async_and_counts_queries(self):
+        async def view(request):
+            return HttpResponse(str(await Note.objects.acount()))
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        before = registry.views.get('<unresolved>')
+        before_sum = before.queries.sum if before else 0
+
+        response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(registry.views['<unresolved>'].queries.sum - before_sum, 1)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class TestappConfig(AppConfig):
     name = 'myauthapp'
+
+    def ready(self):
+        # Fail at startup, not at the first login, if PBKDF2_ITERATIONS is too low
+        from . import hashers  # noqa: F401
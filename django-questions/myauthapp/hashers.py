@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+from django.core.exceptions import ImproperlyConfigured
+
+# Django's own default; calibration may only raise the cost above it
+MIN_ITERATIONS = PBKDF2PasswordHasher.iterations
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 at PBKDF2_ITERATIONS, as recommended by `manage.py calibrate_hashers`.
+
+    Same algorithm name as Django's hasher, so existing hashes verify
+    unchanged. Hashes below the configured cost are rehashed on the next
+    login; stronger ones are left alone, so lowering the setting never
+    weakens stored passwords.
+    """
+    iterations = getattr(settings, 'PBKDF2_ITERATIONS', None) or MIN_ITERATIONS
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded['iterations'] < self.iterations or must_update_salt(decoded['salt'], self.salt_entropy)
+
+
+if TunedPBKDF2PasswordHasher.iterations < MIN_ITERATIONS:
+    raise ImproperlyConfigured(
+        f'PBKDF2_ITERATIONS is {TunedPBKDF2PasswordHasher.iterations}, below the '
+        f'minimum of {MIN_ITERATIONS} (Django\'s default)'
+    )
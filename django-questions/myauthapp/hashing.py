@@ -0,0 +1,102 @@
+"""
+Password hashing off the event loop, in a bounded pool.
+
+PBKDF2 takes tens of milliseconds of CPU per call. The async login and
+register views await it here instead of running it on the event loop, so
+a burst of logins cannot stall every other request. hashlib releases the
+GIL while it hashes, so a thread pool uses all HASHING_WORKERS cores.
+
+At most HASHING_QUEUE_DEPTH calls wait for a free worker. Beyond that
+`PoolSaturated` is raised straight away, and the views answer 503 with a
+Retry-After header rather than letting requests queue until they time out.
+"""
+
+import asyncio
+import functools
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from monitoring.metrics import registry
+
+WORKERS = getattr(settings, 'HASHING_WORKERS', None) or os.cpu_count() or 1
+QUEUE_DEPTH = getattr(settings, 'HASHING_QUEUE_DEPTH', 4 * WORKERS)
+RETRY_AFTER_SECONDS = 2
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers=WORKERS, queue_depth=QUEUE_DEPTH):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hashing')
+        # One slot per running call plus one per waiting call
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    async def run(self, operation, func, *args):
+        """Run func(*args) on a worker, recording its wait and hashing time under `operation`"""
+        if not self.slots.acquire(blocking=False):
+            registry.record_hashing_rejected()
+            raise PoolSaturated
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                registry.record_hashing(operation, started - submitted, time.perf_counter() - started)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.slots.release()
+
+
+pool = HashingPool()
+
+
+def check_and_rehash(password, encoded):
+    """check_password, plus a new hash if the stored one is outdated.
+
+    Returns (valid, new hash or None). A hash is outdated when it was made
+    by a hasher other than the first in PASSWORD_HASHERS, or at a different
+    cost (see `manage.py calibrate_hashers`).
+    """
+    new_hash = []
+    valid = hashers.check_password(password, encoded, setter=lambda raw: new_hash.append(hashers.make_password(raw)))
+    return valid, new_hash[0] if new_hash else None
+
+
+async def make_password(password):
+    return await pool.run('make', hashers.make_password, password)
+
+
+@functools.cache
+def dummy_hash():
+    """A hash of a random password by the default hasher at its current cost"""
+    return hashers.make_password(secrets.token_urlsafe())
+
+
+def check_dummy(password):
+    hashers.check_password(password, dummy_hash())
+
+
+async def verify_password(password, encoded):
+    """check_and_rehash on the pool, costing the same when there is no stored hash.
+
+    Pass encoded=None for an unknown username: the password is checked
+    against a dummy hash at the default hasher's cost, as Django's
+    ModelBackend does, so the response time does not reveal which
+    usernames exist.
+    """
+    if encoded is None:
+        await pool.run('dummy', check_dummy, password)
+        return False, None
+    return await pool.run('check', check_and_rehash, password, encoded)
@@ -0,0 +1,90 @@
+import math
+import statistics
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+from myauthapp import hashing
+
+# Cost attribute of each hasher algorithm, and how hashing time grows with it
+COST_PARAMETERS = {
+    'pbkdf2_sha256': ('iterations', 'linear'),
+    'pbkdf2_sha1': ('iterations', 'linear'),
+    'argon2': ('time_cost', 'linear'),
+    'scrypt': ('work_factor', 'power of two'),
+    'bcrypt_sha256': ('rounds', 'log2'),
+    'bcrypt': ('rounds', 'log2'),
+}
+
+
+def default_cost(hasher, attribute):
+    """The cost Django's own hasher class uses, which a recommendation never goes below"""
+    for cls in type(hasher).__mro__:
+        if cls.__module__ == 'django.contrib.auth.hashers' and attribute in vars(cls):
+            return vars(cls)[attribute]
+    return getattr(hasher, attribute)
+
+
+def recommend(cost, seconds, target_seconds, scale, minimum):
+    """The cost at which one hash should take about `target_seconds`, at least `minimum`"""
+    ratio = target_seconds / seconds
+    if scale == 'log2':
+        recommended = min(31, cost + round(math.log2(ratio)))
+    elif scale == 'power of two':
+        recommended = 2 ** round(math.log2(cost * ratio))
+    else:
+        # Two significant figures are as precise as the timing is
+        recommended = int(float(f'{cost * ratio:.2g}'))
+    return max(minimum, recommended)
+
+
+class Command(BaseCommand):
+    help = 'Time the configured password hashers on this machine and recommend a cost for a target latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=100, help='Wanted time per hash (default 100)')
+        parser.add_argument('--rounds', type=int, default=3, help='Hashes timed per hasher; the median is used')
+
+    def handle(self, *args, target_ms, rounds, **options):
+        target_seconds = target_ms / 1000
+        self.stdout.write(
+            f'Target {target_ms:g} ms per hash, with {hashing.WORKERS} hashing workers '
+            f'(HASHING_WORKERS) and a queue of {hashing.QUEUE_DEPTH}.'
+        )
+
+        for position, hasher in enumerate(get_hashers()):
+            label = f'{hasher.algorithm}{" (default)" if position == 0 else ""}'
+            try:
+                salt = hasher.salt()
+                timings = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    hasher.encode('calibrate-hashers', salt)
+                    timings.append(time.perf_counter() - started)
+            except ValueError as error:
+                # Raised when the hasher's library (argon2-cffi, bcrypt) is missing
+                self.stdout.write(f'{label}: skipped, {error}')
+                continue
+
+            seconds = statistics.median(timings)
+            if hasher.algorithm not in COST_PARAMETERS:
+                self.stdout.write(f'{label}: {seconds * 1000:.1f} ms, no cost factor to tune')
+                continue
+
+            attribute, scale = COST_PARAMETERS[hasher.algorithm]
+            cost = getattr(hasher, attribute)
+            minimum = default_cost(hasher, attribute)
+            recommended = recommend(cost, seconds, target_seconds, scale, minimum)
+            floor_note = " (Django's default, the minimum)" if recommended == minimum else ''
+            self.stdout.write(
+                f'{label}: {attribute}={cost} takes {seconds * 1000:.1f} ms '
+                f'(about {hashing.WORKERS / seconds:.0f} logins/s) -> recommend {attribute}={recommended}{floor_note}'
+            )
+
+        default = get_hashers()[0]
+        if default.algorithm == 'pbkdf2_sha256':
+            self.stdout.write(self.style.SUCCESS(
+                '\nSet PBKDF2_ITERATIONS in settings to the recommended pbkdf2_sha256 iterations. '
+                'Stored passwords move to the new cost as students next log in.'
+            ))
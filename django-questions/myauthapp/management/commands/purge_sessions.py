@@ -0,0 +1,29 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in batches, so no single write holds the database lock for long'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired sessions')
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        # expire_date is indexed, so each batch is found without a scan
+        expired = Session.objects.filter(expire_date__lt=timezone.now()).order_by('expire_date')
+        if dry_run:
+            self.stdout.write(f'Would delete {expired.count()} expired sessions')
+            return
+
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            with transaction.atomic():
+                Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+        self.stdout.write(f'Deleted {deleted} expired sessions')
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myauthapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+"""
+Creating an account row whose fields must be unique, in one INSERT.
+
+Checking each unique field with its own exists() query before saving costs
+a round trip per field and still lets two concurrent sign-ups through.
+`create_unique` inserts straight away and lets the database's unique
+constraints decide. Only when the insert fails does one combined lookup
+find which of the fields were taken, so the form can show the same
+per-field errors as before.
+"""
+
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import FileField, Q
+
+
+def create_unique(model, unique_messages, **values):
+    """Create a `model` row from `values`.
+
+    `unique_messages` maps each unique field to the error shown when its
+    value is taken, in the order the errors should be shown. Returns
+    (instance, {}) on success or (None, {field: message}) on a clash.
+    """
+    instance = model(**values)
+    try:
+        # Savepoint, so a clash does not break an enclosing transaction
+        with transaction.atomic():
+            instance.save(force_insert=True)
+            return instance, {}
+    except IntegrityError:
+        delete_saved_files(instance)
+        errors = taken_fields(model, unique_messages, values)
+        if not errors:
+            # Some other constraint failed
+            raise
+        return None, errors
+
+
+def delete_saved_files(instance):
+    # File fields are written to storage just before the INSERT
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, FileField) and getattr(instance, field.attname):
+            getattr(instance, field.attname).delete(save=False)
+
+
+def taken_fields(model, unique_messages, values):
+    lookup = reduce(or_, (Q(**{field: values[field]}) for field in unique_messages))
+    taken = set()
+    for row in model.objects.filter(lookup).values(*unique_messages):
+        taken.update(field for field in unique_messages if row[field] == values[field])
+    return {field: message for field, message in unique_messages.items() if field in taken}
+
+
+acreate_unique = sync_to_async(create_unique)
@@ -1,3 +1,44 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import get_hasher
+from django.test import SimpleTestCase
+
+from . import hashing
+from .hashers import MIN_ITERATIONS, TunedPBKDF2PasswordHasher
+from .management.commands.calibrate_hashers import recommend
+
+
+class TunedHasherTests(SimpleTestCase):
+    def setUp(self):
+        self.hasher = TunedPBKDF2PasswordHasher()
+        self.hasher.iterations = MIN_ITERATIONS * 2
+
+    def encode(self, iterations):
+        return self.hasher.encode('secret', self.hasher.salt(), iterations)
+
+    def test_weaker_hashes_are_rehashed(self):
+        self.assertTrue(self.hasher.must_update(self.encode(MIN_ITERATIONS)))
+
+    def test_stronger_hashes_are_kept(self):
+        self.assertFalse(self.hasher.must_update(self.encode(MIN_ITERATIONS * 2)))
+        self.assertFalse(self.hasher.must_update(self.encode(MIN_ITERATIONS * 3)))
+
+
+class RecommendTests(SimpleTestCase):
+    def test_slow_machine_gets_the_minimum(self):
+        # 400 ms per hash against a 100 ms target would suggest a quarter
+        self.assertEqual(recommend(MIN_ITERATIONS, 0.4, 0.1, 'linear', MIN_ITERATIONS), MIN_ITERATIONS)
+
+    def test_fast_machine_gets_more(self):
+        self.assertEqual(recommend(MIN_ITERATIONS, 0.05, 0.1, 'linear', MIN_ITERATIONS), MIN_ITERATIONS * 2)
+        self.assertEqual(recommend(12, 0.025, 0.1, 'log2', 12), 14)
+
+
+class VerifyPasswordTests(SimpleTestCase):
+    async def test_unknown_user_costs_a_check_at_the_default_cost(self):
+        with mock.patch('django.contrib.auth.hashers.check_password', wraps=hashing.hashers.check_password) as check:
+            self.assertEqual(await hashing.verify_password('guess', None), (False, None))
+        password, encoded = check.call_args.args
+        self.assertEqual(password, 'guess')
+        hasher = get_hasher()
+        self.assertEqual(hasher.decode(encoded)['iterations'], hasher.iterations)
@@ -1,28 +1,43 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth.hashers import check_password, make_password
+from ratelimit.decorators import rate_limit
+from . import hashing
+from .signup import acreate_unique
 from .models import Student
 
 
-def student_login(request):
+def try_again(request, template):
+    """503 for when the hashing pool is saturated; the client should retry shortly"""
+    response = render(request, template, {
+        'error': 'The server is busy right now. Please try again in a few seconds.'
+    }, status=503)
+    response['Retry-After'] = str(hashing.RETRY_AFTER_SECONDS)
+    return response
+
+
+# Async so that hashing waits in hashing.pool instead of holding a worker
+@rate_limit('login')
+async def student_login(request):
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
 
+        student = await Student.objects.filter(username=username).afirst()
         try:
-            student = Student.objects.get(username=username)
-            # Check hashed password
-            if check_password(password, student.password):
-                request.session['student_id'] = student.id
-                request.session['student_name'] = student.name
-                return redirect('dashboard')
-            else:
-                return render(request, 'testapp/login.html', {
-                    'error': 'Invalid username/password'
-                })
-        except Student.DoesNotExist:
-            return render(request, 'testapp/login.html', {
-                'error': 'Invalid username/password'
-            })
+            # Unknown usernames are hashed too, so they take as long to reject
+            valid, new_hash = await hashing.verify_password(password, student.password if student else None)
+        except hashing.PoolSaturated:
+            return try_again(request, 'testapp/login.html')
+
+        if valid:
+            if new_hash:
+                # Move the stored hash to the current hasher and cost
+                await Student.objects.filter(id=student.id).aupdate(password=new_hash)
+            await request.session.aset('student_id', student.id)
+            await request.session.aset('student_name', student.name)
+            return redirect('dashboard')
+        return render(request, 'testapp/login.html', {
+            'error': 'Invalid username/password'
+        })
 
     return render(request, 'testapp/login.html')
 
@@ -42,7 +57,8 @@ def logout(request):
     return redirect('login')
 
 
-def student_register(request):
+@rate_limit('register')
+async def student_register(request):
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
@@ -61,25 +77,24 @@ def student_register(request):
                 'error': 'Passwords do not match'
             })
 
-        # Check if username already exists
-        if Student.objects.filter(username=username).exists():
-            return render(request, 'testapp/register.html', {
-                'error': 'Username already exists'
-            })
-
-        # Check if email already exists
-        if Student.objects.filter(email=email).exists():
-            return render(request, 'testapp/register.html', {
-                'error': 'Email already registered'
-            })
-
-        # Create new student with hashed password
-        Student.objects.create(
+        # Create new student with hashed password; the unique username and
+        # email constraints reject taken values in the same INSERT
+        try:
+            hashed_password = await hashing.make_password(password)
+        except hashing.PoolSaturated:
+            return try_again(request, 'testapp/register.html')
+        student, errors = await acreate_unique(
+            Student,
+            {'username': 'Username already exists', 'email': 'Email already registered'},
             username=username,
-            password=make_password(password),
+            password=hashed_password,
             name=name,
             email=email
         )
+        if errors:
+            return render(request, 'testapp/register.html', {
+                'error': next(iter(errors.values()))
+            })
 
         return render(request, 'testapp/register.html', {
             'success': 'Account created successfully! You can now login.'
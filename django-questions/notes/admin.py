@@ -1,8 +1,13 @@
 from django.contrib import admin
 from .models import Note
+from .search import filter_notes
 
 
 @admin.register(Note)
 class NoteAdmin(admin.ModelAdmin):
-    list_display = ['title', 'description', 'created_at']
+    list_display = ['title', 'preview', 'created_at']
     search_fields = ['title', 'description']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE scans over every note
+        return filter_notes(queryset, search_term), False
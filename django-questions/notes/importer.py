@@ -0,0 +1,133 @@
+"""
+Bulk import of notes from JSON Lines or CSV.
+
+Files are read as a stream, one row at a time, so memory use does not grow
+with the file. Rows are checked with the same rules as the add form
+(`validate_note`); invalid rows are skipped and reported. Valid rows are
+inserted with bulk_create, and each batch commits in its own transaction,
+so a failure part way through keeps the batches already imported.
+
+Both formats need a `title` and a `description` per row: one JSON object
+per line for JSONL, or a header row naming those columns for CSV. A CSV
+field may be up to MAX_CSV_FIELD_SIZE characters, well above the csv
+module's default of 128 KiB; a longer one, like any other malformed CSV
+row, is skipped and reported rather than ending the import.
+"""
+
+import csv
+import io
+import json
+import time
+
+from django.db import transaction
+
+from .models import Note, derived_fields, validate_note
+
+FORMATS = ('jsonl', 'csv')
+DEFAULT_BATCH_SIZE = 1000
+# Only the first few problems are kept; the rest are just counted
+MAX_REPORTED_ERRORS = 50
+MAX_CSV_FIELD_SIZE = 64 * 1024 * 1024
+INVALID_ROW = {'jsonl': 'Not a valid JSON object.', 'csv': 'Not a valid CSV row.'}
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return (self.imported + self.skipped) / self.elapsed if self.elapsed else 0
+
+    def skip(self, line, problems):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Row {line}: {" ".join(problems)}')
+
+
+def guess_format(filename):
+    """Pick the format from a file name, defaulting to JSONL"""
+    return 'csv' if filename.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, format):
+    """Yield (line number, row dict or None) from a text stream"""
+    if format == 'csv':
+        # The limit is process-wide; only ever raise it
+        csv.field_size_limit(max(csv.field_size_limit(), MAX_CSV_FIELD_SIZE))
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error:
+                # The parser moves on to the next line; DictReader's own
+                # line_num is only updated after a good row
+                yield reader.reader.line_num, None
+            else:
+                yield reader.line_num, row
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def import_notes(stream, format='jsonl', batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Import notes from a text stream; `progress(result)` runs after each batch"""
+    if format not in FORMATS:
+        raise ValueError(f'Unknown format {format!r}, expected one of {", ".join(FORMATS)}')
+
+    result = ImportResult()
+    batch = []
+    for line_number, row in read_rows(stream, format):
+        if row is None:
+            result.skip(line_number, [INVALID_ROW[format]])
+            continue
+
+        title = str(row.get('title') or '').strip()
+        description = str(row.get('description') or '').strip()
+        errors = validate_note(title, description)
+        if errors:
+            result.skip(line_number, errors)
+            continue
+
+        # bulk_create skips save(), so fill in the derived columns here
+        batch.append(Note(title=title, description=description, **derived_fields(description)))
+        if len(batch) >= batch_size:
+            save_batch(batch, result, progress)
+            batch = []
+
+    if batch:
+        save_batch(batch, result, progress)
+    return result
+
+
+def save_batch(batch, result, progress):
+    with transaction.atomic():
+        Note.objects.bulk_create(batch)
+    result.imported += len(batch)
+    if progress:
+        progress(result)
+
+
+def import_uploaded_file(uploaded_file, batch_size=DEFAULT_BATCH_SIZE):
+    """Import a file uploaded to a view, decoding it as UTF-8 while streaming"""
+    stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        return import_notes(stream, guess_format(uploaded_file.name), batch_size)
+    finally:
+        # Leave the upload's own file open for Django to clean up
+        stream.detach()
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from notes import views
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Benchmark many editors saving the same note with optimistic concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent editors')
+        parser.add_argument('--edits', type=int, default=100, help='Saves per editor')
+
+    def handle(self, *args, threads, edits, **options):
+        note = Note.objects.create(title='edit benchmark', description='edit benchmark')
+        try:
+            statuses, queries, elapsed = self.run_editors(note, threads, edits)
+            total = threads * edits
+            saved = statuses.get(302, 0)
+            conflicts = statuses.get(409, 0)
+            final = Note.objects.get(id=note.id).version
+            self.stdout.write(
+                f'{total} saves in {elapsed:.2f}s ({total / elapsed:.0f} saves/s), '
+                f'{queries / total:.1f} queries/save'
+            )
+            self.stdout.write(
+                f'{saved} applied, {conflicts} conflicts ({conflicts / total:.0%}), '
+                f'other responses: {dict((k, v) for k, v in statuses.items() if k not in (302, 409))}'
+            )
+            # Every applied save bumps the version exactly once; a lost
+            # update would leave the version behind the applied count.
+            consistent = final == 1 + saved
+            self.stdout.write(
+                f'final version {final}, {"consistent" if consistent else "LOST UPDATES"}'
+            )
+        finally:
+            note.delete()
+
+    def run_editors(self, note, threads, edits):
+        factory = RequestFactory()
+        statuses = [{} for _ in range(threads)]
+        counts = [0] * threads
+        barrier = threading.Barrier(threads + 1)
+
+        def editor(slot):
+            def count(execute, sql, params, many, context):
+                counts[slot] += 1
+                return execute(sql, params, many, context)
+
+            try:
+                barrier.wait()
+                for n in range(edits):
+                    # Load the edit form, then save it
+                    version = Note.objects.values_list('version', flat=True).get(id=note.id)
+                    request = factory.post('/', {
+                        'title': f'editor {slot}',
+                        'description': f'edit {n} by editor {slot}',
+                        'version': version,
+                    })
+                    request._messages = CookieStorage(request)
+                    with connection.execute_wrapper(count):
+                        response = views.edit_note(request, note.id)
+                    statuses[slot][response.status_code] = statuses[slot].get(response.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=editor, args=(slot,)) for slot in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        merged = {}
+        for slot_statuses in statuses:
+            for status, number in slot_statuses.items():
+                merged[status] = merged.get(status, 0) + number
+        return merged, sum(counts), elapsed
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importer import DEFAULT_BATCH_SIZE, FORMATS, guess_format, import_notes
+
+
+class Command(BaseCommand):
+    help = 'Import notes from a JSON Lines or CSV file (use - for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        format = format or guess_format(path)
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.imported} imported, {result.skipped} skipped '
+                f'({result.rows_per_second:.0f} rows/s)'
+            )
+
+        try:
+            if path == '-':
+                result = import_notes(sys.stdin, format, batch_size, progress)
+            else:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    result = import_notes(stream, format, batch_size, progress)
+        except OSError as error:
+            raise CommandError(error)
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} notes, skipped {result.skipped} rows '
+            f'in {result.elapsed:.1f}s ({result.rows_per_second:.0f} rows/s)'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from notes.markdown import RENDERER_VERSION, render_markdown
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Render the Markdown of notes rendered by an older renderer version (or all with --all)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help='Re-render every note')
+
+    def handle(self, *args, batch_size, **options):
+        notes = Note.objects.order_by('id')
+        if not options['all']:
+            notes = notes.exclude(rendered_version=RENDERER_VERSION)
+
+        # Walk the table by id so each batch is a short transaction and an
+        # interrupted run can simply be started again
+        sql = f'UPDATE {Note._meta.db_table} SET description_html = %s, rendered_version = %s WHERE id = %s'
+        last_id = 0
+        rendered = 0
+        while True:
+            batch = list(notes.filter(id__gt=last_id).values_list('id', 'description')[:batch_size])
+            if not batch:
+                break
+            rows = [(render_markdown(description), RENDERER_VERSION, note_id) for note_id, description in batch]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            last_id = batch[-1][0]
+            rendered += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} notes with renderer version {RENDERER_VERSION}'))
@@ -0,0 +1,125 @@
+"""
+A small Markdown renderer for note descriptions.
+
+Supports the everyday subset: paragraphs (single newlines become line
+breaks), # headings, - / * and 1. lists, > quotes, ``` fenced code,
+`inline code`, **bold**, *italic* / _italic_ and [links](https://...).
+
+Rendering is escape-first: the source is HTML-escaped before any markup is
+added, so the only tags in the output are the ones emitted here and raw
+HTML in a note shows up as text. Links are only made for http(s), mailto
+and relative URLs.
+
+Bump RENDERER_VERSION whenever the output for some input changes, then run
+`manage.py render_notes` to re-render stored notes.
+"""
+
+import re
+
+from django.utils.html import escape
+
+RENDERER_VERSION = 1
+
+HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*\s*$')
+BULLET = re.compile(r'\s*[-*+]\s+(.*)$')
+NUMBERED = re.compile(r'\s*\d{1,9}[.)]\s+(.*)$')
+FENCE = '```'
+
+CODE_SPAN = re.compile(r'(`[^`]+`)')
+LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+ITALIC = re.compile(r'(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![\w*])|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)')
+
+SAFE_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def render_markdown(text):
+    """Render Markdown source to HTML that is safe to mark_safe()"""
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        if not line.strip():
+            i += 1
+        elif line.lstrip().startswith(FENCE):
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].lstrip().startswith(FENCE):
+                code.append(lines[i])
+                i += 1
+            i += 1  # Closing fence
+            blocks.append('<pre><code>' + escape('\n'.join(code)) + '</code></pre>')
+        elif HEADING.match(line):
+            marks, content = HEADING.match(line).groups()
+            blocks.append(f'<h{len(marks)}>{render_inline(content)}</h{len(marks)}>')
+            i += 1
+        elif line.startswith('>'):
+            quoted = []
+            while i < len(lines) and lines[i].startswith('>'):
+                quoted.append(lines[i][1:].removeprefix(' '))
+                i += 1
+            blocks.append('<blockquote>' + render_markdown('\n'.join(quoted)) + '</blockquote>')
+        elif BULLET.match(line) or NUMBERED.match(line):
+            pattern, tag = (BULLET, 'ul') if BULLET.match(line) else (NUMBERED, 'ol')
+            items = []
+            while i < len(lines) and pattern.match(lines[i]):
+                items.append('<li>' + render_inline(pattern.match(lines[i]).group(1)) + '</li>')
+                i += 1
+            blocks.append(f'<{tag}>' + ''.join(items) + f'</{tag}>')
+        else:
+            paragraph = []
+            while i < len(lines) and lines[i].strip() and not starts_block(lines[i]):
+                paragraph.append(render_inline(lines[i].strip()))
+                i += 1
+            blocks.append('<p>' + '<br>\n'.join(paragraph) + '</p>')
+    return '\n'.join(blocks)
+
+
+def starts_block(line):
+    return (
+        line.lstrip().startswith(FENCE)
+        or line.startswith('>')
+        or bool(HEADING.match(line) or BULLET.match(line) or NUMBERED.match(line))
+    )
+
+
+def render_inline(text):
+    # Code spans first, so markup inside them is shown as typed
+    parts = []
+    for part in CODE_SPAN.split(text):
+        if len(part) > 2 and part.startswith('`') and part.endswith('`'):
+            parts.append('<code>' + escape(part[1:-1]) + '</code>')
+        else:
+            parts.append(render_links(escape(part)))
+    return ''.join(parts)
+
+
+def render_links(text):
+    # Links are cut out before emphasis so underscores in URLs survive
+    parts = []
+    position = 0
+    for match in LINK.finditer(text):
+        label, url = match.groups()
+        parts.append(render_emphasis(text[position:match.start()]))
+        if is_safe_url(url):
+            parts.append(f'<a href="{url}" rel="nofollow noopener">{render_emphasis(label)}</a>')
+        else:
+            parts.append(render_emphasis(label))
+        position = match.end()
+    parts.append(render_emphasis(text[position:]))
+    return ''.join(parts)
+
+
+def render_emphasis(text):
+    text = BOLD.sub(r'<strong>\1</strong>', text)
+    return ITALIC.sub(lambda match: f'<em>{match.group(1) or match.group(2)}</em>', text)
+
+
+def is_safe_url(url):
+    """Allow relative URLs and the schemes in SAFE_SCHEMES"""
+    head = url.split('/', 1)[0]
+    if ':' not in head:
+        return True
+    return head.split(':', 1)[0].lower() in SAFE_SCHEMES
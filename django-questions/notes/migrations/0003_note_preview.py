@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+# The search triggers as notes.search defined them when this migration was
+# written; migrations keep their own copy so later edits cannot change them
+FTS_TABLE = 'notes_note_fts'
+
+CREATE_TRIGGERS_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, description ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql, params=None)
+
+
+# notes.models.make_preview as of this migration
+def make_preview(description):
+    text = ' '.join(description.split())
+    if len(text) <= 120:
+        return text
+    return text[:119].rstrip() + '…'
+
+
+def backfill_previews(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for note_id, description in notes.values_list('id', 'description').iterator(chunk_size=1000):
+            batch.append((make_preview(description), note_id))
+            if len(batch) == 1000:
+                cursor.executemany('UPDATE notes_note SET preview = %s WHERE id = %s', batch)
+                batch = []
+        cursor.executemany('UPDATE notes_note SET preview = %s WHERE id = %s', batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_fts'),
+    ]
+
+    operations = [
+        # Restores the search triggers after unapplying drops the column
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AddField(
+            model_name='note',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=120),
+        ),
+        # SQLite adds the column by rebuilding notes_note, which drops the
+        # full-text search triggers
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_previews, migrations.RunPython.noop),
+    ]
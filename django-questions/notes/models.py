@@ -1,13 +1,76 @@
 from django.db import models
 
+from .markdown import RENDERER_VERSION, render_markdown
+
+PREVIEW_LENGTH = 120
+
+
+def make_preview(description):
+    """Shorten a description to one line of at most PREVIEW_LENGTH characters"""
+    text = ' '.join(description.split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rstrip() + '…'
+
+
+def validate_note(title, description):
+    """Return the list of problems with a note's stripped title and description"""
+    errors = []
+    if not title:
+        errors.append('Title field is empty.')
+    elif len(title) > Note._meta.get_field('title').max_length:
+        errors.append('Title field is too long.')
+    if not description:
+        errors.append('Description field is empty.')
+    return errors
+
+
+def derived_fields(description):
+    """Columns computed from a description, for writes that bypass save()"""
+    return {
+        'preview': make_preview(description),
+        'description_html': render_markdown(description),
+        'rendered_version': RENDERER_VERSION,
+    }
+
 
 class Note(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
+    # Kept in step with description by save(), so the listing never has to
+    # load the full text and pages never run the Markdown parser.
+    # bulk_create()/update() callers must set them too (see derived_fields).
+    preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, editable=False)
+    description_html = models.TextField(blank=True, editable=False)
+    # RENDERER_VERSION that produced description_html; 0 means not rendered
+    rendered_version = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by every edit; an edit only applies to the version it was based on
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        note._saved_description = note.__dict__.get('description')
+        return note
+
+    def save(self, *args, **kwargs):
+        # Re-render only when the description changed since it was loaded
+        if (
+            self.description != getattr(self, '_saved_description', None)
+            or self.rendered_version != RENDERER_VERSION
+        ):
+            fields = derived_fields(self.description)
+            for name, value in fields.items():
+                setattr(self, name, value)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *fields}
+        super().save(*args, **kwargs)
+        self._saved_description = self.description
+
     class Meta:
         ordering = ['-id']
@@ -0,0 +1,99 @@
+"""
+Full-text search over notes using an SQLite FTS5 index.
+
+`notes_note_fts` is an external-content FTS5 table: it stores only the
+index and reads titles and descriptions back from `notes_note`, which
+triggers keep it in step with on every insert, update and delete. The
+migration that creates it (notes/migrations/0002_note_fts.py) is a no-op on
+other databases, where search falls back to case-insensitive LIKE matching.
+
+Any migration that makes Django rebuild the `notes_note` table (which
+drops its triggers) must create them again afterwards, from its own copy of
+the trigger SQL: migrations do not import app code.
+"""
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+
+# Title matches weigh more than description matches in the bm25 ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# snippet() markers; control characters cannot come from the form fields,
+# so they survive HTML escaping and are then swapped for <mark> tags
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Turn user input into an FTS5 query that ANDs its words.
+
+    Each word is quoted so operators and punctuation in the input are
+    matched literally instead of raising a syntax error; the last word also
+    matches as a prefix, so partly typed words still find notes.
+    """
+    words = query.split()
+    if not words:
+        return ''
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def filter_notes(queryset, query):
+    """Narrow a Note queryset to the notes matching `query`"""
+    expression = match_expression(query)
+    if not expression:
+        return queryset
+    if not fts_available():
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    ))
+
+
+def search_notes(query, limit=20):
+    """Return the best `limit` notes for `query`, best first.
+
+    Each note gets a `snippet` attribute: an HTML-safe excerpt of its
+    best-matching field with the matched words wrapped in <mark>.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    if not fts_available():
+        notes = list(filter_notes(Note.objects.all(), query)[:limit])
+        for note in notes:
+            note.snippet = escape(note.description[:200])
+        return notes
+
+    notes = Note.objects.raw(
+        f"""SELECT notes_note.*,
+                   snippet({FTS_TABLE}, -1, %s, %s, '…', 16) AS raw_snippet
+            FROM {FTS_TABLE}
+            JOIN notes_note ON notes_note.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY bm25({FTS_TABLE}, %s, %s)
+            LIMIT %s""",
+        [MATCH_START, MATCH_END, expression, TITLE_WEIGHT, DESCRIPTION_WEIGHT, limit],
+    )
+    notes = list(notes)
+    for note in notes:
+        note.snippet = mark_safe(
+            escape(note.raw_snippet)
+            .replace(MATCH_START, '<mark>')
+            .replace(MATCH_END, '</mark>')
+        )
+    return notes
@@ -1,3 +1,119 @@
-from django.test import TestCase
+import csv
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .importer import MAX_REPORTED_ERRORS, import_notes
+from .markdown import render_markdown
+from .models import Note
+
+
+class EditNoteTests(TestCase):
+    def setUp(self):
+        self.note = Note.objects.create(title='Shopping', description='milk')
+        self.url = reverse('notes:edit', args=[self.note.id])
+
+    def test_validation_error_keeps_posted_version(self):
+        # Someone else saves while this editor still has version 1 loaded
+        Note.objects.filter(id=self.note.id).update(title='Theirs', version=2)
+
+        response = self.client.post(self.url, {'title': '', 'description': 'milk, eggs', 'version': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'name="version" value="1"')
+        self.assertContains(response, 'milk, eggs')
+
+        # Fixing the field and resubmitting the form as rendered must not
+        # overwrite the other edit
+        response = self.client.post(self.url, {'title': 'Mine', 'description': 'milk, eggs', 'version': '1'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Note.objects.get(id=self.note.id).title, 'Theirs')
+
+    def test_edit_of_current_version_is_saved(self):
+        response = self.client.post(self.url, {'title': 'Mine', 'description': 'eggs', 'version': '1'})
+        self.assertRedirects(response, reverse('notes:index'))
+        note = Note.objects.get(id=self.note.id)
+        self.assertEqual((note.title, note.version), ('Mine', 2))
+
+
+class MarkdownTests(SimpleTestCase):
+    def test_raw_html_is_shown_as_text(self):
+        self.assertEqual(render_markdown('<script>alert(1)</script>'),
+                         '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+        self.assertEqual(render_markdown('# Title <i>'), '<h1>Title &lt;i&gt;</h1>')
+        self.assertEqual(render_markdown('```\n<b>**not bold**</b>\n```'),
+                         '<pre><code>&lt;b&gt;**not bold**&lt;/b&gt;</code></pre>')
+        self.assertEqual(render_markdown('`<b>` **b**'), '<p><code>&lt;b&gt;</code> <strong>b</strong></p>')
+
+    def test_links_only_for_safe_urls(self):
+        for url in ('https://example.com/a_b', 'mailto:me@example.com', '/notes/1'):
+            self.assertEqual(render_markdown(f'[x]({url})'),
+                             f'<p><a href="{url}" rel="nofollow noopener">x</a></p>')
+        for url in ('javascript:alert(1)', 'JaVaScRiPt:alert(1)', 'data:text/html,hi',
+                    '&#106;avascript:alert(1)'):
+            self.assertNotIn('<a', render_markdown(f'[x]({url})'), url)
+
+    def test_quotes_cannot_leave_the_href(self):
+        html = render_markdown('[x](https://example.com/"onmouseover="alert(1))')
+        self.assertIn('href="https://example.com/&quot;onmouseover=&quot;alert(1"', html)
+
+    def test_blocks(self):
+        self.assertEqual(
+            render_markdown('one\ntwo\n\n- a\n- *b*\n\n1. c\n\n> _q_'),
+            '<p>one<br>\ntwo</p>\n<ul><li>a</li><li><em>b</em></li></ul>\n<ol><li>c</li></ol>\n'
+            '<blockquote><p><em>q</em></p></blockquote>',
+        )
+
+
+class ImporterTests(TestCase):
+    def test_jsonl_skips_and_reports_invalid_rows(self):
+        stream = io.StringIO(
+            '{"title": "Milk", "description": "**2** litres"}\n'
+            '\n'
+            'not json\n'
+            '["a", "list"]\n'
+            '{"title": "", "description": "no title"}\n'
+            '{"title": "' + 'x' * 101 + '", "description": "too long"}\n'
+            '{"title": " Eggs ", "description": " a dozen "}\n'
+        )
+        progress = mock.Mock()
+        result = import_notes(stream, batch_size=1, progress=progress)
+        self.assertEqual((result.imported, result.skipped), (2, 4))
+        self.assertEqual(result.errors, [
+            'Row 3: Not a valid JSON object.',
+            'Row 4: Not a valid JSON object.',
+            'Row 5: Title field is empty.',
+            'Row 6: Title field is too long.',
+        ])
+        self.assertEqual(progress.call_count, 2)
+        milk, eggs = Note.objects.order_by('id')
+        self.assertEqual((eggs.title, eggs.description), ('Eggs', 'a dozen'))
+        # bulk_create bypasses save(), so the importer fills these in
+        self.assertEqual(milk.description_html, '<p><strong>2</strong> litres</p>')
+        self.assertEqual(milk.preview, '**2** litres')
+
+    def test_csv_skips_rows_without_description_and_oversized_fields(self):
+        stream = io.StringIO(
+            'title,description\r\n'
+            'Milk,2 litres\r\n'
+            'Bread,\r\n'
+            'Cheese,' + 'x' * 40 + '\r\n'
+            '"Quoted, title","spans\nlines"\r\n'
+        )
+        # Shrink the process-wide limit so a short field counts as oversized
+        self.addCleanup(csv.field_size_limit, csv.field_size_limit(32))
+        with mock.patch('notes.importer.MAX_CSV_FIELD_SIZE', 32):
+            result = import_notes(stream, format='csv')
+        self.assertEqual((result.imported, result.skipped), (2, 2))
+        self.assertEqual(result.errors, ['Row 3: Description field is empty.', 'Row 4: Not a valid CSV row.'])
+        self.assertEqual(Note.objects.get(title='Quoted, title').description, 'spans\nlines')
+
+    def test_too_many_errors_are_counted_not_kept(self):
+        result = import_notes(io.StringIO('bad\n' * (MAX_REPORTED_ERRORS + 5)))
+        self.assertEqual(result.skipped, MAX_REPORTED_ERRORS + 5)
+        self.assertEqual(len(result.errors), MAX_REPORTED_ERRORS)
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            import_notes(io.StringIO(''), format='xml')
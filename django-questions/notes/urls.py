@@ -5,7 +5,10 @@ app_name = 'notes'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('search/', views.search, name='search'),
+    path('<int:note_id>/', views.detail, name='detail'),
     path('add/', views.add_note, name='add'),
+    path('import/', views.import_file, name='import'),
     path('edit/<int:note_id>/', views.edit_note, name='edit'),
     path('delete/<int:note_id>/', views.delete_note, name='delete'),
 ]
@@ -1,12 +1,66 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from .models import Note
+from django.db.models import F
+from django.http import Http404
+from archive.archiver import get_archived, with_archived
+from monitoring.querybudget import query_budget
+from .models import Note, derived_fields, validate_note
+from .importer import import_uploaded_file
+from .markdown import RENDERER_VERSION, render_markdown
+from .search import search_notes
 
 
-# READ - Display all notes (equivalent to index.php)
+PAGE_SIZE = 50
+
+
+# READ - Display notes a page at a time (equivalent to index.php)
+# The page, archived notes and a session read for messages
+@query_budget(3)
 def index(request):
-    notes = Note.objects.all()  # Already ordered by -id in model Meta
-    return render(request, 'notes/index.html', {'notes': notes})
+    # Only the listing columns; the full description is loaded by detail
+    notes = Note.objects.only('id', 'title', 'preview', 'created_at')  # Ordered by -id
+
+    # Keyset pagination: each page continues below the last id shown
+    before = request.GET.get('before', '')
+    if before.isdigit():
+        notes = notes.filter(id__lt=int(before))
+
+    notes = list(notes[:PAGE_SIZE + 1])
+    # Archived notes are all older, so they continue after the last hot page
+    include_archived = request.GET.get('archived') == '1'
+    if include_archived:
+        notes = with_archived(notes, Note, limit=PAGE_SIZE + 1,
+                              before_pk=int(before) if before.isdigit() else None)
+
+    next_before = notes[PAGE_SIZE - 1].id if len(notes) > PAGE_SIZE else None
+    return render(request, 'notes/index.html', {
+        'notes': notes[:PAGE_SIZE],
+        'next_before': next_before,
+        'is_first_page': not before,
+        'include_archived': include_archived,
+    })
+
+
+# READ - Display one note in full
+def detail(request, note_id):
+    note = Note.objects.filter(id=note_id).first() or get_archived(Note, note_id)
+    if note is None:
+        raise Http404('No Note matches the given query.')
+
+    if note.rendered_version != RENDERER_VERSION:
+        if getattr(note, 'is_archived', False):
+            note.description_html = render_markdown(note.description)
+        else:
+            # Notes not yet rendered by `render_notes` are rendered and stored once
+            note.save(update_fields=['description_html', 'rendered_version'])
+    return render(request, 'notes/detail.html', {'note': note})
+
+
+# SEARCH - Full-text search, best matches first
+def search(request):
+    query = request.GET.get('q', '').strip()
+    notes = search_notes(query) if query else []
+    return render(request, 'notes/search.html', {'query': query, 'notes': notes})
 
 
 # CREATE - Add new note (equivalent to add.html + addAction.php)
@@ -16,11 +70,7 @@ def add_note(request):
         description = request.POST.get('description', '').strip()
 
         # Validation
-        errors = []
-        if not title:
-            errors.append('Title field is empty.')
-        if not description:
-            errors.append('Description field is empty.')
+        errors = validate_note(title, description)
 
         if errors:
             return render(request, 'notes/add.html', {'errors': errors})
@@ -33,34 +83,63 @@ def add_note(request):
     return render(request, 'notes/add.html')
 
 
+# CREATE - Import many notes from an uploaded JSONL or CSV file
+def import_file(request):
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            return render(request, 'notes/import.html', {'errors': ['No file selected.']})
+
+        result = import_uploaded_file(upload)
+        return render(request, 'notes/import.html', {'result': result})
+
+    return render(request, 'notes/import.html')
+
+
 # UPDATE - Edit note (equivalent to edit.php + editAction.php)
 def edit_note(request, note_id):
-    note = get_object_or_404(Note, id=note_id)
-
     if request.method == 'POST':
         title = request.POST.get('title', '').strip()
         description = request.POST.get('description', '').strip()
+        version = request.POST.get('version', '')
 
         # Validation
-        errors = []
-        if not title:
-            errors.append('Title field is empty.')
-        if not description:
-            errors.append('Description field is empty.')
+        errors = validate_note(title, description)
+        if not version.isdigit():
+            errors.append('Missing note version, please reload the page.')
 
         if errors:
+            # Show what was posted, version included: the form must stay
+            # based on the copy the user loaded, or the next submit would
+            # overwrite edits saved in the meantime
+            note = get_object_or_404(Note, id=note_id)
+            note.title, note.description, note.version = title, description, version
             return render(request, 'notes/edit.html', {
                 'note': note,
                 'errors': errors
             })
 
-        # Update note
-        note.title = title
-        note.description = description
-        note.save()
+        # Update note only if nobody else saved it since it was loaded,
+        # in a single conditional UPDATE
+        updated = Note.objects.filter(id=note_id, version=int(version)).update(
+            title=title,
+            description=description,
+            version=F('version') + 1,
+            **derived_fields(description),
+        )
+        if not updated:
+            # Either the note is gone or someone else edited it first: show
+            # their copy next to ours so the editor can merge by hand
+            note = get_object_or_404(Note, id=note_id)
+            return render(request, 'notes/edit.html', {
+                'note': note,
+                'conflict': {'title': title, 'description': description},
+            }, status=409)
+
         messages.success(request, 'Data updated successfully!')
         return redirect('notes:index')
 
+    note = get_object_or_404(Note, id=note_id)
     return render(request, 'notes/edit.html', {'note': note})
 
 
@@ -1,3 +1,20 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Patient
+
+
+@override_settings(QUERY_BUDGETS_ENABLED=True)
+class PatientListTests(TestCase):
+    def test_list_stays_within_query_budget(self):
+        Patient.objects.bulk_create(
+            Patient(
+                name=f'Patient {n}', patient_id=f'PAT-{n}', mobile='9800000000',
+                gender='F', dob=date(1990, 1, 1), doctor_name='Dr. Rai',
+            )
+            for n in range(30)
+        )
+        response = self.client.get(reverse('patient_list'))
+        self.assertContains(response, 'PAT-29')
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from monitoring.querybudget import query_budget
 from .forms import PatientForm
 from .models import Patient
 import uuid
@@ -35,6 +36,8 @@ def patient_registration(request):
     return render(request, 'patient/patient_form.html', {'form': form})
 
 
+# The list plus a session read for messages
+@query_budget(2)
 def patient_list(request):
     patients = Patient.objects.all()
     return render(request, 'patient/patient_list.html', {'patients': patients})
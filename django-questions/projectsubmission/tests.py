@@ -1,3 +1,39 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import ProjectSubmission
+
+
+@override_settings(QUERY_BUDGETS_ENABLED=True)
+class SubmissionListTests(TestCase):
+    databases = {'default', 'archive'}
+
+    @classmethod
+    def setUpTestData(cls):
+        ProjectSubmission.objects.bulk_create(
+            ProjectSubmission(
+                tu_registration_number=f'TU-{n}', email=f'student{n}@example.com',
+                project_file=f'projects/project{n}.pdf',
+            )
+            for n in range(30)
+        )
+
+    def test_list_stays_within_query_budget(self):
+        response = self.client.get(reverse('submission_list'))
+        self.assertContains(response, 'TU-29')
+
+    def test_list_with_archived_stays_within_query_budget(self):
+        response = self.client.get(reverse('submission_list'), {'archived': '1'})
+        self.assertContains(response, 'TU-29')
+
+    @mock.patch('projectsubmission.views.PAGE_SIZE', 20)
+    def test_archived_list_is_paged(self):
+        response = self.client.get(reverse('submission_list'), {'archived': '1'})
+        self.assertEqual(len(response.context['submissions']), 20)
+        next_before = response.context['next_before']
+        response = self.client.get(reverse('submission_list'), {'archived': '1', 'before': next_before})
+        self.assertEqual(len(response.context['submissions']), 10)
+        self.assertIsNone(response.context['next_before'])
+        self.assertContains(response, 'TU-0')
@@ -1,17 +1,27 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from archive.archiver import is_key_archived, with_archived
+from monitoring.querybudget import query_budget
+from ratelimit.decorators import rate_limit
 from .forms import ProjectSubmissionForm
 from .models import ProjectSubmission
 
 
+PAGE_SIZE = 50
+
+
+@rate_limit('project_upload')
 def project_upload(request):
     if request.method == 'POST':
         form = ProjectSubmissionForm(request.POST, request.FILES)
 
         if form.is_valid():
-            # Check if registration number already exists
+            # Check if registration number already exists, archived or not
             reg_number = form.cleaned_data['tu_registration_number']
-            if ProjectSubmission.objects.filter(tu_registration_number=reg_number).exists():
+            if (
+                ProjectSubmission.objects.filter(tu_registration_number=reg_number).exists()
+                or is_key_archived(ProjectSubmission, reg_number)
+            ):
                 form.add_error('tu_registration_number',
                                'This registration number already submitted')
                 return render(request, 'projectsubmission/project_form.html', {'form': form})
@@ -32,6 +42,26 @@ def project_upload(request):
     return render(request, 'projectsubmission/project_form.html', {'form': form})
 
 
+# The list, the archived rows and a session read for messages
+@query_budget(3)
 def submission_list(request):
     submissions = ProjectSubmission.objects.all()
-    return render(request, 'projectsubmission/submission_list.html', {'submissions': submissions})
+    include_archived = request.GET.get('archived') == '1'
+    before = request.GET.get('before', '')
+    next_before = None
+    if include_archived:
+        # The archive can be far larger than the hot table, so with it the
+        # list is paged by id, like the notes index
+        submissions = submissions.order_by('-id')
+        if before.isdigit():
+            submissions = submissions.filter(id__lt=int(before))
+        submissions = with_archived(submissions[:PAGE_SIZE + 1], ProjectSubmission, limit=PAGE_SIZE + 1,
+                                    before_pk=int(before) if before.isdigit() else None)
+        next_before = submissions[PAGE_SIZE - 1].id if len(submissions) > PAGE_SIZE else None
+        submissions = submissions[:PAGE_SIZE]
+    return render(request, 'projectsubmission/submission_list.html', {
+        'submissions': submissions,
+        'next_before': next_before,
+        'is_first_page': not before,
+        'include_archived': include_archived,
+    })
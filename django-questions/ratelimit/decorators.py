@@ -0,0 +1,66 @@
+import math
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+
+from .limiter import limiter
+
+
+def client_id(request):
+    """The client's address, from RATE_LIMIT_CLIENT_HEADER when behind a proxy"""
+    header = getattr(settings, 'RATE_LIMIT_CLIENT_HEADER', None)
+    if header and request.META.get(header):
+        # The proxy appends, so the last address is the one it saw
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(wait):
+    seconds = max(1, math.ceil(wait))
+    response = HttpResponse(
+        'Too many requests. Please try again later.',
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def rate_limit(scope, methods=('POST',)):
+    """Limit each client's `methods` requests to the view by RATE_LIMITS[scope].
+
+    RateLimitMiddleware does the check in process_view, before
+    CsrfViewMiddleware reads request.POST, so a refused upload is never
+    parsed or written to disk. Without the middleware the view checks for
+    itself, after CSRF has already read the body.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method in methods and not getattr(request, 'rate_limit_checked', False):
+                    if limiter.store.blocking:
+                        wait = await sync_to_async(limiter.check)(scope, client_id(request))
+                    else:
+                        wait = limiter.check(scope, client_id(request))
+                    if wait:
+                        return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method in methods and not getattr(request, 'rate_limit_checked', False):
+                    wait = limiter.check(scope, client_id(request))
+                    if wait:
+                        return too_many_requests(wait)
+                return view(request, *args, **kwargs)
+
+        wrapper.rate_limit_scope = scope
+        wrapper.rate_limit_methods = methods
+        return wrapper
+
+    return decorator
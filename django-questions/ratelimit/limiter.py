@@ -0,0 +1,155 @@
+"""
+Token buckets for rate limiting, kept in memory or shared through SQLite.
+
+Each (scope, client) pair has a bucket holding up to `count` tokens that
+refills evenly over the period of its rate, e.g. '10/m' holds 10 tokens
+and gains one every 6 seconds. A request takes a token or is refused with
+the time until the next one. A bucket is just (tokens, last update), so a
+check is O(1) in either store.
+
+MemoryStore keeps the buckets of one process in an OrderedDict in LRU
+order and evicts the least recently used past RATE_LIMIT_MAX_BUCKETS; an
+evicted bucket comes back full. With several worker processes each has its
+own buckets, so use SqliteStore there: one small SQLite file, separate
+from the application database, that every worker updates under
+BEGIN IMMEDIATE so two processes cannot spend the same token.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MAX_BUCKETS = getattr(settings, 'RATE_LIMIT_MAX_BUCKETS', 10000)
+
+CREATE_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated);
+'''
+
+UPSERT_SQL = '''
+INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+'''
+
+# Keep only the most recently used buckets, like MemoryStore
+EVICT_SQL = 'DELETE FROM buckets WHERE key IN (SELECT key FROM buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)'
+
+
+def parse_rate(rate):
+    """'10/m' -> (capacity 10, refill rate 10/60 tokens per second)"""
+    count, _, period = rate.partition('/')
+    if not count.isdigit() or int(count) < 1 or period not in PERIODS:
+        raise ImproperlyConfigured(f'Invalid rate {rate!r}, expected a count and s, m, h or d, e.g. "10/m"')
+    return int(count), int(count) / PERIODS[period]
+
+
+def spend(tokens, updated, now, capacity, rate):
+    """Refill a bucket up to `now` and take a token; return (tokens left, seconds to wait)"""
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryStore:
+    blocking = False
+
+    def __init__(self, max_buckets=MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            # Popping and re-adding moves the bucket to the most recent end
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens, wait = spend(tokens, updated, now, capacity, rate)
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+class SqliteStore:
+    # Waits for other processes' writes, so async views call it in a thread
+    blocking = True
+    EVICT_EVERY = 1000
+
+    def __init__(self, path, max_buckets=MAX_BUCKETS):
+        self.path = str(path)
+        self.max_buckets = max_buckets
+        self._local = threading.local()
+        self._takes = 0
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(CREATE_TABLE_SQL)
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Wall-clock time, since the buckets are shared between processes
+            now = time.time()
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, wait = spend(*(row or (capacity, now)), now, capacity, rate)
+            connection.execute(UPSERT_SQL, (key, tokens, now))
+            self._takes += 1
+            if self._takes % self.EVICT_EVERY == 0:
+                connection.execute(EVICT_SQL, (self.max_buckets,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, store, rates, client_rates=None):
+        self.store = store
+        self.rates = {scope: parse_rate(rate) for scope, rate in rates.items()}
+        self.client_rates = {
+            client: {scope: parse_rate(rate) for scope, rate in scopes.items()}
+            for client, scopes in (client_rates or {}).items()
+        }
+
+    def check(self, scope, client):
+        """Take a token for `client` in `scope`; return 0 if allowed, else seconds to wait.
+
+        Scopes without a rate in RATE_LIMITS are not limited.
+        """
+        limit = self.client_rates.get(client, {}).get(scope) or self.rates.get(scope)
+        if limit is None:
+            return 0.0
+        return self.store.take(f'{scope}:{client}', *limit)
+
+
+def make_store():
+    backend = getattr(settings, 'RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryStore()
+    if backend == 'sqlite':
+        return SqliteStore(getattr(settings, 'RATE_LIMIT_SQLITE_PATH', settings.BASE_DIR / 'ratelimit.sqlite3'))
+    raise ImproperlyConfigured(f"RATE_LIMIT_BACKEND must be 'memory' or 'sqlite', not {backend!r}")
+
+
+limiter = RateLimiter(
+    make_store(),
+    getattr(settings, 'RATE_LIMITS', {}),
+    getattr(settings, 'RATE_LIMIT_CLIENT_RATES', {}),
+)
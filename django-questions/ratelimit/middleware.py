@@ -0,0 +1,44 @@
+from asgiref.sync import sync_to_async
+from django.utils.deprecation import MiddlewareMixin
+
+from .decorators import client_id, too_many_requests
+from .limiter import limiter
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """Apply a @rate_limit view's limit before any other middleware reads the body.
+
+    Must come before CsrfViewMiddleware, whose process_view parses
+    request.POST (and so stores uploaded files) to find the token.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            # Django would otherwise run the sync hook in a thread per request
+            self.process_view = self.aprocess_view
+
+    def scope_for(self, request, view_func):
+        scope = getattr(view_func, 'rate_limit_scope', None)
+        if scope is None or request.method not in view_func.rate_limit_methods:
+            return None
+        # Tell the view's own wrapper not to take a second token
+        request.rate_limit_checked = True
+        return scope
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        scope = self.scope_for(request, view_func)
+        if scope is None:
+            return None
+        wait = limiter.check(scope, client_id(request))
+        return too_many_requests(wait) if wait else None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        scope = self.scope_for(request, view_func)
+        if scope is None:
+            return None
+        if limiter.store.blocking:
+            wait = await sync_to_async(limiter.check)(scope, client_id(request))
+        else:
+            wait = limiter.check(scope, client_id(request))
+        return too_many_requests(wait) if wait else None
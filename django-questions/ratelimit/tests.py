@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .decorators import rate_limit
+from .limiter import MemoryStore, RateLimiter
+from .middleware import RateLimitMiddleware
+
+
+def view(request):
+    return HttpResponse('ok')
+
+
+async def async_view(request):
+    return HttpResponse('ok')
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(
+            MemoryStore(max_buckets=2),
+            {'login': '2/m'},
+            {'10.0.0.1': {'login': '3/m'}},
+        )
+        for module in ('ratelimit.decorators', 'ratelimit.middleware'):
+            patcher = mock.patch(f'{module}.limiter', self.limiter)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        clock = mock.patch('ratelimit.limiter.time')
+        self.clock = clock.start().monotonic
+        self.clock.return_value = 1000.0
+        self.addCleanup(clock.stop)
+        self.factory = RequestFactory()
+        self.middleware = RateLimitMiddleware(view)
+
+    def post(self, view_func, address='127.0.0.1'):
+        request = self.factory.post('/', REMOTE_ADDR=address)
+        return self.middleware.process_view(request, view_func, (), {}) or view_func(request)
+
+    def test_refuses_with_retry_after_then_refills(self):
+        limited = rate_limit('login')(view)
+        self.assertEqual(self.post(limited).status_code, 200)
+        self.assertEqual(self.post(limited).status_code, 200)
+
+        refused = self.post(limited)
+        self.assertEqual(refused.status_code, 429)
+        # One token every 30 seconds at 2/m
+        self.assertEqual(refused['Retry-After'], '30')
+
+        self.clock.return_value += 29
+        self.assertEqual(self.post(limited)['Retry-After'], '1')
+        self.clock.return_value += 1
+        self.assertEqual(self.post(limited).status_code, 200)
+
+    def test_view_does_not_take_a_second_token_after_the_middleware(self):
+        limited = rate_limit('login')(view)
+        self.post(limited)
+        self.assertEqual(self.limiter.store.buckets['login:127.0.0.1'][0], 1)
+
+    def test_get_and_unlimited_scopes_are_not_counted(self):
+        self.assertEqual(self.middleware.process_view(self.factory.get('/'), rate_limit('login')(view), (), {}), None)
+        for _ in range(5):
+            self.assertEqual(self.post(rate_limit('search')(view)).status_code, 200)
+        self.assertEqual(len(self.limiter.store.buckets), 0)
+
+    def test_client_rate_overrides_scope_rate(self):
+        limited = rate_limit('login')(view)
+        statuses = [self.post(limited, '10.0.0.1').status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        statuses = [self.post(limited, '10.0.0.2').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_least_recently_used_bucket_is_evicted(self):
+        store = self.limiter.store
+        for address in ('10.0.0.2', '10.0.0.3', '10.0.0.2', '10.0.0.4'):
+            self.limiter.check('login', address)
+        self.assertEqual(list(store.buckets), ['login:10.0.0.2', 'login:10.0.0.4'])
+        # An evicted client comes back with a full bucket
+        self.limiter.check('login', '10.0.0.3')
+        self.assertEqual(store.buckets['login:10.0.0.3'][0], 1)
+
+    async def test_async_wrapper_without_middleware(self):
+        limited = rate_limit('login')(async_view)
+        statuses = [(await limited(self.factory.post('/'))).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual((await limited(self.factory.get('/'))).status_code, 200)
+
+    async def test_async_middleware_takes_one_token_per_request(self):
+        middleware = RateLimitMiddleware(async_view)
+        limited = rate_limit('login')(async_view)
+        statuses = []
+        for _ in range(3):
+            request = self.factory.post('/')
+            response = await middleware.process_view(request, limited, (), {}) or await limited(request)
+            statuses.append(response.status_code)
+        self.assertEqual(statuses, [200, 200, 429])
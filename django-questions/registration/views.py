@@ -1,10 +1,13 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password
+from myauthapp.signup import create_unique
+from ratelimit.decorators import rate_limit
 from .forms import RegistrationForm
 from .models import Registration
 
 
+@rate_limit('registration')
 def registration_form(request):
     """Handle registration form display and submission"""
     if request.method == 'POST':
@@ -14,8 +17,10 @@ def registration_form(request):
             # Get cleaned data
             data = form.cleaned_data
 
-            # Create registration instance
-            registration = Registration(
+            # Create the registration; a taken email comes back as a field error
+            registration, errors = create_unique(
+                Registration,
+                {'email': 'This email is already registered'},
                 name=data['name'],
                 gender=data['gender'],
                 hobbies=data['hobbies'],
@@ -26,7 +31,10 @@ def registration_form(request):
                 resume=data['resume'],
                 password=make_password(data['password']),  # Hash password
             )
-            registration.save()
+            if errors:
+                for field, error in errors.items():
+                    form.add_error(field, error)
+                return render(request, 'registration/form.html', {'form': form})
 
             messages.success(request, 'Form submitted successfully!')
             return redirect('registration:form')
@@ -1,6 +1,8 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password
+from monitoring.querybudget import query_budget
+from myauthapp.signup import create_unique
 from .forms import UserRegistrationForm
 from .models import User
 
@@ -10,26 +12,20 @@ def user_registration(request):
         form = UserRegistrationForm(request.POST)
 
         if form.is_valid():
-            # Check if email already exists
-            email = form.cleaned_data['email']
-            if User.objects.filter(email=email).exists():
-                form.add_error('email', 'Email already registered')
-                return render(request, 'user/user_form.html', {'form': form})
-
-            # Check if username already exists
-            username = form.cleaned_data['username']
-            if User.objects.filter(username=username).exists():
-                form.add_error('username', 'Username already taken')
-                return render(request, 'user/user_form.html', {'form': form})
-
-            # Create user record
-            user = User(
+            # One INSERT; the unique email and username constraints reject
+            # taken values, which come back as field errors
+            user, errors = create_unique(
+                User,
+                {'email': 'Email already registered', 'username': 'Username already taken'},
                 full_name=form.cleaned_data['full_name'],
-                email=email,
-                username=username,
+                email=form.cleaned_data['email'],
+                username=form.cleaned_data['username'],
                 password=make_password(form.cleaned_data['password']),
             )
-            user.save()
+            if errors:
+                for field, error in errors.items():
+                    form.add_error(field, error)
+                return render(request, 'user/user_form.html', {'form': form})
 
             messages.success(request, 'User registered successfully!')
             return redirect('user_list')
@@ -39,6 +35,8 @@ def user_registration(request):
     return render(request, 'user/user_form.html', {'form': form})
 
 
+# The list plus a session read for messages
+@query_budget(2)
 def user_list(request):
     users = User.objects.all()
     return render(request, 'user/user_list.html', {'users': users})
@@ -82,6 +82,29 @@ DATABASES = {
     }
 }
 
+# Per-list shards for grocery items (see grocery.routers). Each shard is its
+# own SQLite file with its own write lock; a list's items go to shard
+# `list_id % GROCERY_SHARD_COUNT`. 0 keeps everything in the default database.
+# Changing it moves most lists to another shard. After raising it, create
+# the shards/ directory, run `migrate --database=grocery_shard_<n>` for each
+# new shard and then `manage.py shard_grocery_items`, which moves every
+# list's rows from the default database and the other shards into its new
+# one, renumbering items whose id the target shard already uses. Only raise
+# it: the shards dropped by lowering it are no longer configured, so their
+# rows could not be moved back. While sharded, new item ids are reserved
+# GROCERY_ID_BLOCK_SIZE at a time from a sequence in the default database.
+GROCERY_SHARD_COUNT = 0
+GROCERY_SHARDS = [f'grocery_shard_{n}' for n in range(GROCERY_SHARD_COUNT)]
+GROCERY_ID_BLOCK_SIZE = 100
+
+for alias in GROCERY_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'shards' / f'{alias}.sqlite3',
+    }
+
+DATABASE_ROUTERS = ['grocery.routers.GroceryShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -123,4 +146,48 @@ STATIC_URL = 'static/'
 MESSAGE_TAGS = {
     message_constants.ERROR: 'error',
     message_constants.SUCCESS: 'success',
-}
\ No newline at end of file
+}
+
+
+# Backend for the grocery change stream (grocery.events). The in-process
+# broker only reaches clients of the same worker process.
+GROCERY_EVENT_BROKER = 'grocery.events.InProcessBroker'
+
+
+# How toggle_completed writes (grocery.writebehind). 'write-through' writes
+# each toggle before responding. 'buffered' coalesces toggles for
+# GROCERY_TOGGLE_FLUSH_SECONDS and writes them in one UPDATE per shard;
+# toggles still buffered when the process crashes are lost.
+GROCERY_TOGGLE_MODE = 'write-through'
+GROCERY_TOGGLE_FLUSH_SECONDS = 0.5
+
+
+# Session and flash message storage. In 'file' and 'locmem' modes sessions
+# are read from the 'sessions' cache and written through to the database
+# (Django's cached_db engine), and flash messages live in a signed cookie,
+# so most requests no longer touch the session table. 'file' shares the
+# cache between the processes of one host; 'locmem' is per process and only
+# safe with a single worker process, since other processes would keep
+# serving a session after it changed. 'db' is Django's default and keeps
+# sessions and messages as they were; set 'file' to opt in. Run
+# `manage.py clearsessions` periodically to delete expired sessions.
+SESSION_STORAGE_MODE = 'db'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if SESSION_STORAGE_MODE in ('file', 'locmem'):
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'session_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    } if SESSION_STORAGE_MODE == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'sessions'
+    MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
@@ -1,9 +1,17 @@
 from django.contrib import admin
-from .models import GroceryItem
+from .models import GroceryItem, GroceryList
 
 
+@admin.register(GroceryList)
+class GroceryListAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+
+
+# Only shows items stored in the default database, i.e. all of them unless
+# GROCERY_SHARDS is configured.
 @admin.register(GroceryItem)
 class GroceryItemAdmin(admin.ModelAdmin):
-    list_display = ['name', 'completed', 'created_at']
+    list_display = ['name', 'list_id', 'completed', 'created_at']
     list_filter = ['completed']
     search_fields = ['name']
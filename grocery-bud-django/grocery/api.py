@@ -0,0 +1,295 @@
+"""
+JSON endpoints for the grocery list, used by the JS and React clients.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .events import get_broker, publish
+from .models import GroceryItem, GroceryItemTombstone, GroceryList
+from .pagination import KeysetPaginator
+from .ranking import key_between, schedule_rebalance_if_needed
+
+MAX_BATCH_SIZE = 500
+KEEPALIVE_SECONDS = 15
+
+# Tombstones older than this are purged (manage.py purge_tombstones); clients
+# that last synced before then get a full snapshot instead of a delta.
+TOMBSTONE_RETENTION = timedelta(days=getattr(settings, 'GROCERY_TOMBSTONE_RETENTION_DAYS', 30))
+# Sync tokens trail the clock by this much, so a write stamped just before a
+# sync but committed just after it is still picked up by the next sync.
+SYNC_GRACE = timedelta(seconds=2)
+
+
+def serialize_item(item):
+    return {
+        'id': item.id,
+        'list': item.list_id,
+        'name': item.name,
+        'completed': item.completed,
+        'rank': item.rank,
+        'created_at': item.created_at,
+        'updated_at': item.updated_at,
+    }
+
+
+def items_etag(request, list_id):
+    """Fingerprint a list with a single aggregate query.
+
+    Any add or edit moves the latest `updated_at` and any delete changes the
+    row count, so a matching tag means the client's copy is still current.
+    The query string is folded in because each cursor is a different page.
+    An unknown list is a 404 here too, not a 304 for its empty fingerprint.
+    """
+    get_object_or_404(GroceryList, id=list_id)
+    stats = GroceryItem.objects.for_list(list_id).aggregate(
+        count=Count('id'),
+        last_modified=Max('updated_at'),
+    )
+    key = f"{stats['count']}|{stats['last_modified']}|{request.GET.urlencode()}"
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=items_etag)
+def item_list(request, list_id):
+    """Return one page of a list's items, or 304 if the client's copy is current"""
+    get_object_or_404(GroceryList, id=list_id)
+    paginator = KeysetPaginator(GroceryItem.objects.for_list(list_id), 'rank', descending=False)
+    page = paginator.page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return JsonResponse({
+        'items': [serialize_item(item) for item in page.items],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@require_POST
+def batch(request, list_id):
+    """Apply a list of add/toggle/rename/delete operations in one transaction.
+
+    Expects {"operations": [{"op": "add", "name": ...}, {"op": "toggle", "id": ...},
+    {"op": "rename", "id": ..., "name": ...}, {"op": "delete", "id": ...}]}.
+    Operations are grouped by kind and applied as one statement each, in the
+    order adds, toggles, renames, deletes. Toggling an item an even number of
+    times is a no-op and the last rename of an item wins. The response holds
+    one result per operation, in request order.
+    """
+    try:
+        operations = json.loads(request.body)['operations']
+    except (ValueError, KeyError, TypeError):
+        operations = None
+    if not isinstance(operations, list):
+        return JsonResponse({'error': 'Expected a JSON object with an "operations" list'}, status=400)
+    if len(operations) > MAX_BATCH_SIZE:
+        return JsonResponse({'error': f'At most {MAX_BATCH_SIZE} operations per batch'}, status=400)
+
+    items = GroceryItem.objects.for_list(list_id)
+    results = [None] * len(operations)
+    adds = []
+    toggles = {}
+    renames = {}
+    deletes = set()
+    targets = {}
+
+    for index, operation in enumerate(operations):
+        kind = operation.get('op') if isinstance(operation, dict) else None
+        name = str(operation.get('name') or '').strip() if kind in ('add', 'rename') else None
+        item_id = operation.get('id') if kind in ('toggle', 'rename', 'delete') else None
+
+        if kind not in ('add', 'toggle', 'rename', 'delete'):
+            results[index] = {'op': kind, 'status': 'invalid', 'error': 'Unknown operation'}
+        elif name == '':
+            results[index] = {'op': kind, 'status': 'invalid', 'error': 'Please provide a value'}
+        elif kind != 'add' and (not isinstance(item_id, int) or isinstance(item_id, bool)):
+            results[index] = {'op': kind, 'status': 'invalid', 'error': 'Missing item id'}
+        elif kind == 'add':
+            adds.append((index, name))
+        else:
+            targets[index] = item_id
+            if kind == 'toggle':
+                toggles[item_id] = toggles.get(item_id, 0) + 1
+            elif kind == 'rename':
+                renames[item_id] = name
+            else:
+                deletes.add(item_id)
+
+    if adds:
+        get_object_or_404(GroceryList, id=list_id)
+
+    with transaction.atomic(using=items.db):
+        existing = set(
+            items.filter(id__in=set(targets.values()))
+            .order_by()
+            .values_list('id', flat=True)
+        )
+        ranks = items.new_ranks(len(adds)) if adds else []
+        created = items.bulk_create([
+            GroceryItem(list_id=list_id, name=name, rank=rank)
+            for (_, name), rank in zip(adds, ranks)
+        ])
+        flipped = [
+            item_id for item_id, count in toggles.items() if count % 2 and item_id in existing
+        ]
+        renamed = {item_id: name for item_id, name in renames.items() if item_id in existing}
+        items.filter(id__in=flipped).toggle()
+        items.rename(renamed)
+        items.filter(id__in=deletes & existing).delete()
+
+        for item in created:
+            publish(list_id, 'add', item=serialize_item(item))
+        for item_id in flipped:
+            publish(list_id, 'toggle', id=item_id)
+        for item_id, name in renamed.items():
+            publish(list_id, 'update', id=item_id, name=name)
+        for item_id in deletes & existing:
+            publish(list_id, 'delete', id=item_id)
+
+    for (index, _), item in zip(adds, created):
+        results[index] = {'op': 'add', 'status': 'ok', 'item': serialize_item(item)}
+    for index, item_id in targets.items():
+        results[index] = {
+            'op': operations[index]['op'],
+            'id': item_id,
+            'status': 'ok' if item_id in existing else 'not_found',
+        }
+
+    return JsonResponse({'results': results})
+
+
+@require_POST
+def move(request, list_id, item_id):
+    """Move an item to a new position, rewriting only that item's rank.
+
+    Expects {"above": id, "below": id}: the items that should end up
+    directly above and below it. Leave out "above" to move to the top of
+    the list, or "below" to move to the bottom. Answers 409 if the two
+    neighbours are no longer in that order; the client should then refresh
+    and retry.
+    """
+    try:
+        payload = json.loads(request.body)
+        above, below = payload.get('above'), payload.get('below')
+    except (ValueError, AttributeError):
+        above = below = None
+    if above is None and below is None:
+        return JsonResponse({'error': 'Expected a JSON object with "above" or "below"'}, status=400)
+    if any(not isinstance(neighbour, int) or isinstance(neighbour, bool)
+           for neighbour in (above, below) if neighbour is not None):
+        return JsonResponse({'error': '"above" and "below" must be item ids'}, status=400)
+
+    items = GroceryItem.objects.for_list(list_id)
+    neighbours = dict(
+        items.filter(id__in=[above, below]).order_by().values_list('id', 'rank')
+    )
+    missing = {above, below} - set(neighbours) - {None}
+    if missing:
+        raise Http404('No GroceryItem matches the given query.')
+
+    lower, upper = neighbours.get(above), neighbours.get(below)
+    if lower is not None and upper is not None and lower >= upper:
+        if lower == upper:
+            # Concurrent inserts produced a tie; spread the keys out again.
+            schedule_rebalance_if_needed(list_id, lower, force=True)
+        return JsonResponse({'error': 'The list order changed, refresh and retry'}, status=409)
+
+    rank = key_between(lower, upper)
+    if not items.filter(id=item_id).update(rank=rank, updated_at=timezone.now()):
+        raise Http404('No GroceryItem matches the given query.')
+    publish(list_id, 'move', id=item_id, rank=rank)
+    schedule_rebalance_if_needed(list_id, rank)
+    return JsonResponse({'id': item_id, 'rank': rank})
+
+
+def encode_sync_token(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_sync_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        moment = parse_datetime(raw)
+    except (binascii.Error, ValueError):
+        return None
+    # Tokens are always issued with a UTC offset; anything else is malformed
+    if moment is None or timezone.is_naive(moment):
+        return None
+    return moment
+
+
+@require_GET
+def sync(request, list_id):
+    """Return the items changed and deleted since the client's sync token.
+
+    Without a usable `since` token, or with one older than the tombstone
+    retention window, the response is a full snapshot flagged `full` and the
+    client should replace its copy. Either way it carries a new token for the
+    next call. Items may occasionally be sent twice; applying them is
+    idempotent.
+    """
+    started = timezone.now()
+    since = decode_sync_token(request.GET.get('since', ''))
+    full = since is None or since < started - TOMBSTONE_RETENTION
+
+    items = GroceryItem.objects.for_list(list_id).order_by()
+    with transaction.atomic(using=items.db):
+        deleted = []
+        if not full:
+            items = items.filter(updated_at__gt=since)
+            deleted = list(
+                GroceryItemTombstone.objects.using(items.db)
+                .filter(list_id=list_id, deleted_at__gt=since)
+                .values_list('item_id', flat=True)
+            )
+        items = [serialize_item(item) for item in items]
+
+    return JsonResponse({
+        'full': full,
+        'items': items,
+        'deleted': deleted,
+        'token': encode_sync_token(started - SYNC_GRACE),
+    })
+
+
+async def stream(request, list_id):
+    """Push a list's item changes to the client as Server-Sent Events.
+
+    Needs the ASGI entry point (djangocrud.asgi); under WSGI the response
+    would be buffered and never reach the client.
+    """
+    async def events():
+        subscription = get_broker().subscribe(list_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    data = json.dumps(event, cls=DjangoJSONEncoder)
+                    yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
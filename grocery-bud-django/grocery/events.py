@@ -0,0 +1,118 @@
+"""
+Change notifications for grocery items.
+
+Write views publish an event on their list's channel once their transaction
+commits, and the async `stream` view relays a list's events to connected
+clients as Server-Sent Events.
+The broker is chosen by the GROCERY_EVENT_BROKER setting. The default
+InProcessBroker only reaches clients connected to the same process; a
+deployment with several workers can point the setting at a subclass of
+BaseBroker backed by a shared channel (Redis pub/sub, Postgres LISTEN, ...).
+"""
+
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .routers import shard_for
+
+
+class BaseBroker:
+    """Interface every event broker implements.
+
+    Channels are grocery list ids. `publish` is called from synchronous
+    views, possibly on several threads. `subscribe` is called from the async
+    stream view and returns an object with an async `get(timeout)` method,
+    which returns the next event or None after `timeout` seconds without
+    one, and a `close()` method.
+    """
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, channel, max_pending):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_pending)
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def deliver(self, event):
+        if self.queue.full():
+            # A slow client fell too far behind; tell it to refetch instead
+            # of letting its backlog grow without bound.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'type': 'resync'}
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(BaseBroker):
+    """Fan events out to the subscribers connected to this process"""
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_pending)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._channels.pop(subscription.channel, None)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'GROCERY_EVENT_BROKER', 'grocery.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(list_id, event_type, **data):
+    """Publish an event to a list's subscribers once the shard transaction commits"""
+    event = {'type': event_type, **data}
+    transaction.on_commit(
+        lambda: get_broker().publish(list_id, event),
+        using=shard_for(list_id),
+    )
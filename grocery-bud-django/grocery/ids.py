@@ -0,0 +1,94 @@
+"""
+Item ids that are unique across every grocery shard.
+
+Each shard is its own SQLite file with its own AUTOINCREMENT, so letting
+the shards number items would hand out the same id on two of them, and
+moving a list between shards (shard_grocery_items) would then clash. While
+GROCERY_SHARDS is set, new items take their id from one sequence row in
+the default database instead. Each process reserves GROCERY_ID_BLOCK_SIZE
+ids at a time, so only one insert in a block writes to the default
+database; ids are unique but not in creation order across processes.
+
+The sequence starts above the highest item id, live or tombstoned, found
+in any database, so ids that clients may still hold are never reused.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+
+from .routers import SHARDS
+
+BLOCK_SIZE = getattr(settings, 'GROCERY_ID_BLOCK_SIZE', 100)
+
+
+def highest_item_id():
+    from .models import GroceryItem, GroceryItemTombstone
+
+    highest = 0
+    for alias in ['default', *SHARDS]:
+        highest = max(
+            highest,
+            GroceryItem.objects.using(alias).aggregate(top=Max('id'))['top'] or 0,
+            GroceryItemTombstone.objects.using(alias).aggregate(top=Max('item_id'))['top'] or 0,
+        )
+    return highest
+
+
+def reserve(count):
+    """Take `count` ids from the shared sequence; return the first one"""
+    from .models import GroceryItemIdSequence
+
+    sequence = GroceryItemIdSequence.objects.using('default')
+    with transaction.atomic(using='default'):
+        if sequence.filter(id=1).update(next_id=F('next_id') + count):
+            return sequence.get(id=1).next_id - count
+    start = highest_item_id() + 1
+    try:
+        with transaction.atomic(using='default'):
+            sequence.create(id=1, next_id=start + count)
+            return start
+    except IntegrityError:
+        # Another process created the row first
+        return reserve(count)
+
+
+class IdAllocator:
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = self._end = 0
+
+    def allocate(self, count=1):
+        """Return `count` unused item ids"""
+        ids = []
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's block
+                self._pid = os.getpid()
+                self._next = self._end = 0
+            while len(ids) < count:
+                if self._next == self._end:
+                    size = max(self.block_size, count - len(ids))
+                    self._next = reserve(size)
+                    self._end = self._next + size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+
+allocator = IdAllocator()
+
+
+def assign_ids(items):
+    """Give items without an id one from the shared sequence, when sharded"""
+    if not SHARDS:
+        return
+    missing = [item for item in items if item.id is None]
+    for item, item_id in zip(missing, allocator.allocate(len(missing)) if missing else []):
+        item.id = item_id
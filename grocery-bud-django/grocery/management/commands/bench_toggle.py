@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.test import RequestFactory
+
+from grocery import views
+from grocery.models import GroceryItem, GroceryList
+from grocery.writebehind import toggle_buffer
+
+
+def read_modify_write_toggle(request, list_id, item_id):
+    """The toggle view as it was before it became a single UPDATE"""
+    item = get_object_or_404(GroceryItem.objects.for_list(list_id), id=item_id)
+    item.completed = not item.completed
+    item.save()
+    return redirect('grocery:index', list_id=list_id)
+
+
+def buffered_toggle(request, list_id, item_id):
+    """The toggle view with GROCERY_TOGGLE_MODE = 'buffered'"""
+    if not GroceryItem.objects.for_list(list_id).filter(id=item_id).exists():
+        raise Http404('No GroceryItem matches the given query.')
+    toggle_buffer.add(list_id, item_id)
+    return redirect('grocery:index', list_id=list_id)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent toggles of one item: read-modify-write, single UPDATE, write-behind'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--clicks', type=int, default=250, help='Toggles per thread')
+
+    def handle(self, *args, threads, clicks, **options):
+        grocery_list = GroceryList.objects.create(name='toggle benchmark')
+        items = GroceryItem.objects.for_list(grocery_list.id)
+        item = items.create(list_id=grocery_list.id, name='toggle benchmark')
+        try:
+            for label, view in (
+                ('read-modify-write', read_modify_write_toggle),
+                ('single UPDATE', views.toggle_completed),
+                ('write-behind', buffered_toggle),
+            ):
+                items.filter(id=item.id).update(completed=False)
+                elapsed, queries = self.run_clicks(view, item, threads, clicks)
+                toggle_buffer.flush()
+                total = threads * clicks
+                # An odd number of clicks must leave the item completed; any
+                # lost update shows up as a parity mismatch.
+                final = items.get(id=item.id).completed
+                consistent = final == (total % 2 == 1)
+                self.stdout.write(
+                    f'{label:>18}: {total} clicks in {elapsed:.2f}s '
+                    f'({total / elapsed:.0f} clicks/s), '
+                    f'{queries / total:.1f} queries/click, '
+                    f'final state {"consistent" if consistent else "LOST UPDATES"}'
+                )
+            stats = toggle_buffer.stats()
+            self.stdout.write(
+                f'{"":>18}  write-behind collapsed {stats["collapsed"]} of '
+                f'{stats["received"]} toggles into {stats["updates"]} UPDATEs'
+            )
+        finally:
+            items.purge()
+            grocery_list.delete()
+
+    def run_clicks(self, view, item, threads, clicks):
+        factory = RequestFactory()
+        counts = [0] * threads
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(slot):
+            def count(execute, sql, params, many, context):
+                counts[slot] += 1
+                return execute(sql, params, many, context)
+
+            connection = connections[item._state.db]
+            try:
+                with connection.execute_wrapper(count):
+                    barrier.wait()
+                    for _ in range(clicks):
+                        view(factory.post('/'), item.list_id, item.id)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, sum(counts)
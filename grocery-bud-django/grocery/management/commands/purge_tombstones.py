@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from grocery.api import TOMBSTONE_RETENTION
+from grocery.models import GroceryItemTombstone
+from grocery.routers import SHARDS
+
+
+class Command(BaseCommand):
+    help = 'Delete grocery tombstones older than the delta-sync retention window'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - TOMBSTONE_RETENTION
+        for alias in ['default', *SHARDS]:
+            deleted, _ = GroceryItemTombstone.objects.using(alias).filter(
+                deleted_at__lt=cutoff
+            ).delete()
+            self.stdout.write(
+                f'{alias}: deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}'
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from grocery.models import GroceryList
+from grocery.ranking import rebalance
+
+
+class Command(BaseCommand):
+    help = 'Rewrite grocery item ranks as short, evenly spaced keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('list_ids', nargs='*', type=int, help='Lists to rebalance (default: all)')
+
+    def handle(self, *args, list_ids, **options):
+        for list_id in list_ids or GroceryList.objects.values_list('id', flat=True):
+            rebalance(list_id)
+            self.stdout.write(f'Rebalanced ranks of list {list_id}')
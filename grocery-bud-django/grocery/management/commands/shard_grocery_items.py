@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from grocery.models import GroceryItem, GroceryItemTombstone
+from grocery.routers import SHARDS, shard_for
+
+
+class Command(BaseCommand):
+    help = ('Move grocery items and tombstones into the shard of their list, from the default '
+            'database and from every configured shard (after GROCERY_SHARD_COUNT changed)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        for source in ['default', *SHARDS]:
+            list_ids = set(GroceryItem.objects.using(source).values_list('list_id', flat=True).distinct())
+            list_ids.update(GroceryItemTombstone.objects.using(source).values_list('list_id', flat=True).distinct())
+            for list_id in sorted(list_ids):
+                alias = shard_for(list_id)
+                if alias == source:
+                    continue
+                moved = self.move_items(list_id, source, alias, batch_size)
+                self.move_tombstones(list_id, source, alias)
+                self.stdout.write(f'List {list_id}: moved {moved} items from {source} to {alias}')
+
+    def move_items(self, list_id, source, alias, batch_size):
+        moved = 0
+        rows = GroceryItem.objects.using(source).filter(list_id=list_id)
+        while True:
+            batch = list(rows.order_by('id')[:batch_size])
+            if not batch:
+                return moved
+            ids = [item.id for item in batch]
+            # The target commits first, then the source. If the source
+            # commit fails the rows exist twice, and the next run finds
+            # them already copied and only removes the originals.
+            with transaction.atomic(using=source), transaction.atomic(using=alias):
+                owners = dict(GroceryItem.objects.using(alias).filter(id__in=ids).values_list('id', 'list_id'))
+                renumbered = set(
+                    GroceryItemTombstone.objects.using(alias)
+                    .filter(list_id=list_id, item_id__in=ids)
+                    .values_list('item_id', flat=True)
+                )
+                copies, tombstones = [], []
+                for item in batch:
+                    if owners.get(item.id) == list_id or item.id in renumbered:
+                        continue
+                    if item.id in owners:
+                        # Before grocery.ids, each shard numbered its own
+                        # items, so another list may hold this id here. The
+                        # item gets a new id and clients drop the old one
+                        # through its tombstone, as for a delete.
+                        tombstones.append(GroceryItemTombstone(list_id=list_id, item_id=item.id))
+                        item.id = None
+                    copies.append(item)
+                GroceryItem.objects.using(alias).bulk_create(copies)
+                GroceryItemTombstone.objects.using(alias).bulk_create(tombstones)
+                GroceryItem.objects.using(source).filter(id__in=ids).purge()
+            if tombstones:
+                self.stdout.write(f'List {list_id}: {len(tombstones)} item ids were taken in {alias}, renumbered')
+            moved += len(batch)
+
+    def move_tombstones(self, list_id, source, alias):
+        rows = GroceryItemTombstone.objects.using(source).filter(list_id=list_id)
+        with transaction.atomic(using=source), transaction.atomic(using=alias):
+            tombstones = list(rows)
+            for tombstone in tombstones:
+                tombstone.pk = None
+            GroceryItemTombstone.objects.using(alias).bulk_create(tombstones, batch_size=1000)
+            rows.delete()
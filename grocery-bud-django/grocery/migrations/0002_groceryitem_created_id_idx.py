@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grocery', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='groceryitem',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['created_at', 'id'], name='grocery_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    GroceryItem = apps.get_model('grocery', 'GroceryItem')
+    GroceryItem.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grocery', '0002_groceryitem_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groceryitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:52
+
+from django.db import migrations, models
+
+from grocery.ranking import key_between
+
+
+def assign_ranks(apps, schema_editor):
+    """Rank existing items in their previous newest-first order"""
+    GroceryItem = apps.get_model('grocery', 'GroceryItem')
+    key = None
+    items = []
+    for item in GroceryItem.objects.order_by('-created_at', '-id').only('id'):
+        key = key_between(key, None)
+        item.rank = key
+        items.append(item)
+    GroceryItem.objects.bulk_update(items, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grocery', '0004_groceryitemtombstone'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='groceryitem',
+            options={'ordering': ['rank', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='groceryitem',
+            name='grocery_created_id_idx',
+        ),
+        migrations.AddField(
+            model_name='groceryitem',
+            name='rank',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['rank', 'id'], name='grocery_rank_id_idx'),
+        ),
+        migrations.RunPython(assign_ranks, migrations.RunPython.noop),
+    ]
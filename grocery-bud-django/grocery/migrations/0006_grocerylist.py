@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:55
+
+from django.db import migrations, models
+
+
+def create_default_list(apps, schema_editor):
+    """Existing items all move into list 1"""
+    GroceryList = apps.get_model('grocery', 'GroceryList')
+    GroceryList.objects.get_or_create(id=1, defaults={'name': 'Groceries'})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grocery', '0005_groceryitem_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroceryList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(create_default_list, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='groceryitem',
+            name='grocery_rank_id_idx',
+        ),
+        migrations.AddField(
+            model_name='groceryitem',
+            name='list_id',
+            field=models.BigIntegerField(default=1),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='groceryitemtombstone',
+            name='list_id',
+            field=models.BigIntegerField(default=1),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='groceryitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='groceryitemtombstone',
+            name='deleted_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['list_id', 'rank', 'id'], name='grocery_list_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitem',
+            index=models.Index(fields=['list_id', 'updated_at'], name='grocery_list_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groceryitemtombstone',
+            index=models.Index(fields=['list_id', 'deleted_at'], name='grocery_list_deleted_idx'),
+        ),
+    ]
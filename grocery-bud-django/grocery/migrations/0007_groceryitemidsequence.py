@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grocery', '0006_grocerylist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroceryItemIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_id', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -1,13 +1,133 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .ids import assign_ids
+from .ranking import keys_before
+from .routers import SHARDS, shard_for
+
+
+class GroceryList(models.Model):
+    name = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['id']
+
+
+class GroceryItemQuerySet(models.QuerySet):
+    # QuerySet.update() bypasses auto_now, so each set-based write stamps
+    # updated_at itself to keep ETags and change tracking honest.
+
+    def for_list(self, list_id):
+        """Items of one list, read from and written to that list's shard"""
+        return self.using(shard_for(list_id)).filter(list_id=list_id)
+
+    def toggle(self):
+        """Flip `completed` on every matched row in a single UPDATE"""
+        return self.update(
+            completed=Case(When(completed=True, then=Value(False)), default=Value(True)),
+            updated_at=timezone.now(),
+        )
+
+    def rename(self, names):
+        """Rename several items in a single UPDATE, given {id: new name}"""
+        if not names:
+            return 0
+        if len(names) == 1:
+            [(item_id, name)] = names.items()
+            return self.filter(id=item_id).update(name=name, updated_at=timezone.now())
+        return self.filter(id__in=names).update(
+            name=Case(*[When(id=item_id, then=Value(name)) for item_id, name in names.items()]),
+            updated_at=timezone.now(),
+        )
+
+    def new_ranks(self, count=1):
+        """Return ranks that put `count` new items on top, newest first"""
+        top = self.order_by('rank', 'id').values_list('rank', flat=True).first()
+        return keys_before(top or None, count)[::-1]
+
+    def delete(self):
+        """Delete matched rows, leaving a tombstone for each for delta sync"""
+        with transaction.atomic(using=self.db):
+            rows = list(self.order_by().values_list('id', 'list_id'))
+            GroceryItemTombstone.objects.using(self.db).bulk_create([
+                GroceryItemTombstone(item_id=item_id, list_id=list_id)
+                for item_id, list_id in rows
+            ])
+            return super().delete()
+
+    def purge(self):
+        """Delete matched rows without tombstones, e.g. once moved to a shard"""
+        return super().delete()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        assign_ids(objs)
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class GroceryItem(models.Model):
+    # Plain id rather than a ForeignKey: items may live in a shard database
+    # (see grocery.routers) while lists stay in the default one.
+    list_id = models.BigIntegerField()
     name = models.CharField(max_length=200)
     completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Fractional sort key (see grocery.ranking); lower ranks are shown first
+    rank = models.CharField(max_length=255, default='')
+
+    objects = GroceryItemQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self.rank:
+            self.rank = GroceryItem.objects.for_list(self.list_id).new_ranks()[0]
+        if self.id is None and SHARDS:
+            assign_ids([self])
+            kwargs['force_insert'] = True
+        super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            GroceryItemTombstone.objects.using(using).create(
+                item_id=self.id,
+                list_id=self.list_id,
+            )
+            return super().delete(using=using, keep_parents=keep_parents)
+
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['rank', 'id']
+        indexes = [
+            # Backs ordered reads and keyset pagination on (rank, id)
+            models.Index(fields=['list_id', 'rank', 'id'], name='grocery_list_rank_idx'),
+            # Backs the ETag aggregate and delta sync
+            models.Index(fields=['list_id', 'updated_at'], name='grocery_list_updated_idx'),
+        ]
+
+
+class GroceryItemTombstone(models.Model):
+    """Marks a deleted GroceryItem so sync clients can drop their copy"""
+    list_id = models.BigIntegerField()
+    item_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.item_id} deleted at {self.deleted_at}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['list_id', 'deleted_at'], name='grocery_list_deleted_idx'),
+        ]
+
+
+class GroceryItemIdSequence(models.Model):
+    """The next free GroceryItem id on any shard (see grocery.ids); one row"""
+    next_id = models.BigIntegerField()
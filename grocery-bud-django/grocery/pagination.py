@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination for grocery items.
+
+Pages are addressed by the ordering key of their boundary rows instead of an
+OFFSET, so fetching any page is one range scan over the (key, id) index no
+matter how large the table is or how deep the user has paged.
+"""
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = getattr(settings, 'GROCERY_PAGE_SIZE', 50)
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+class KeysetPaginator:
+    """Paginate a queryset on (key, id), both sorted in the same direction"""
+
+    def __init__(self, queryset, key, descending=True, page_size=PAGE_SIZE):
+        self.queryset = queryset
+        self.key = key
+        self.descending = descending
+        self.page_size = page_size
+        self.field = queryset.model._meta.get_field(key)
+
+    def encode_cursor(self, item):
+        raw = json.dumps([self.field.value_to_string(item), item.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the (key, id) pair stored in a cursor, or None if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, pk = json.loads(raw)
+            return self.field.to_python(value), int(pk)
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
+
+    def page(self, after=None, before=None):
+        """Return the page following `after`, or preceding `before`"""
+        cursor = self.decode_cursor(before or after) if (before or after) else None
+        forward = cursor is None or not before
+
+        queryset = self.queryset
+        if cursor is not None:
+            queryset = self._seek(queryset, cursor, forward)
+
+        # Walking backwards is a forward walk over the reversed ordering.
+        prefix = '-' if self.descending == forward else ''
+        rows = list(
+            queryset.order_by(f'{prefix}{self.key}', f'{prefix}pk')[:self.page_size + 1]
+        )
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if forward:
+            has_next, has_previous = has_more, cursor is not None
+        else:
+            if not has_more:
+                # Paged back onto the first page; show it in full.
+                return self.page()
+            rows.reverse()
+            has_next, has_previous = True, True
+
+        return Page(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode_cursor(rows[0]) if has_previous and rows else None,
+        )
+
+    def _seek(self, queryset, cursor, forward):
+        value, pk = cursor
+        op = 'lt' if forward == self.descending else 'gt'
+        # The leading inclusive bound on the key alone keeps this a single
+        # index range scan; the OR only breaks ties inside that range.
+        return queryset.filter(**{f'{self.key}__{op}e': value}).filter(
+            Q(**{f'{self.key}__{op}': value}) | Q(**{f'pk__{op}': pk})
+        )
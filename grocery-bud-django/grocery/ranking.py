@@ -0,0 +1,200 @@
+"""
+Fractional rank keys for user-defined ordering of grocery items.
+
+A rank is a base-62 string compared byte-wise, so a key strictly between any
+two others can always be generated and moving an item rewrites only that
+item's row. Each key has a variable-length integer part, whose first
+character encodes its length ('a0'..'az', 'b00'..'bzz', ... upwards and
+'Zz', 'Yzz', ... downwards), followed by an optional fraction. Inserting
+repeatedly at either end only bumps the integer part, so keys stay short;
+repeatedly splitting the same gap lengthens the fraction, which
+`rebalance` eventually resets.
+"""
+
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .events import publish
+from .routers import shard_for
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+SMALLEST_INTEGER = 'A' + '0' * 26
+
+# Keys longer than this trigger a background rebalance.
+REBALANCE_LENGTH = getattr(settings, 'GROCERY_RANK_REBALANCE_LENGTH', 24)
+REBALANCE_BATCH_SIZE = 500
+
+
+def _midpoint(a, b):
+    """Return a fraction strictly between fractions a and b (b=None: no upper bound)"""
+    if b is not None:
+        # Skip the common prefix, treating a as padded with zeros.
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head):
+    if 'a' <= head <= 'z':
+        return ord(head) - ord('a') + 2
+    if 'A' <= head <= 'Z':
+        return ord('Z') - ord(head) + 2
+    raise ValueError(f'Invalid rank key head: {head!r}')
+
+
+def _split(key):
+    """Split a key into its integer part and fraction"""
+    integer = key[:_integer_length(key[0])]
+    fraction = key[len(integer):]
+    if len(integer) != _integer_length(key[0]) or fraction.endswith('0'):
+        raise ValueError(f'Invalid rank key: {key!r}')
+    return integer, fraction
+
+
+def _increment(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        position = DIGITS.index(digits[i]) + 1
+        if position < len(DIGITS):
+            digits[i] = DIGITS[position]
+            return head + ''.join(digits)
+        digits[i] = '0'
+    if head == 'Z':
+        return 'a0'
+    if head == 'z':
+        return None
+    head = chr(ord(head) + 1)
+    if head > 'a':
+        digits.append('0')
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def _decrement(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        position = DIGITS.index(digits[i]) - 1
+        if position >= 0:
+            digits[i] = DIGITS[position]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[-1]
+    if head == 'a':
+        return 'Z' + DIGITS[-1]
+    if head == 'A':
+        return None
+    head = chr(ord(head) - 1)
+    if head < 'Z':
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def key_between(a, b):
+    """Return a rank key strictly between a and b; None means an open end"""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f'Rank keys out of order: {a!r} >= {b!r}')
+
+    if a is None and b is None:
+        return 'a0'
+
+    if a is None:
+        integer, fraction = _split(b)
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint('', fraction)
+        if fraction:
+            return integer
+        lower = _decrement(integer)
+        if lower is None:
+            raise ValueError('Rank keys exhausted')
+        return lower
+
+    integer, fraction = _split(a)
+    if b is None:
+        higher = _increment(integer)
+        return integer + _midpoint(fraction, None) if higher is None else higher
+
+    integer_b, fraction_b = _split(b)
+    if integer == integer_b:
+        return integer + _midpoint(fraction, fraction_b)
+    higher = _increment(integer)
+    if higher is None:
+        raise ValueError('Rank keys exhausted')
+    if higher < b:
+        return higher
+    return integer + _midpoint(fraction, None)
+
+
+def keys_before(key, count):
+    """Return `count` ascending keys that sort before `key` (None: anywhere)"""
+    keys = []
+    for _ in range(count):
+        key = key_between(None, key)
+        keys.append(key)
+    return keys[::-1]
+
+
+def rebalance(list_id):
+    """Rewrite a list's ranks as short, evenly spaced keys, keeping the order.
+
+    Runs in one transaction so no move can interleave with the rewrite. The
+    items' updated_at moves too, so sync clients pick up the new ranks.
+    """
+    GroceryItem = apps.get_model('grocery', 'GroceryItem')
+    items = GroceryItem.objects.for_list(list_id)
+    with transaction.atomic(using=items.db):
+        now = timezone.now()
+        key = None
+        batch = []
+        for item in items.order_by('rank', 'id').only('id', 'rank').iterator():
+            key = key_between(key, None)
+            item.rank = key
+            item.updated_at = now
+            batch.append(item)
+            if len(batch) == REBALANCE_BATCH_SIZE:
+                items.bulk_update(batch, ['rank', 'updated_at'])
+                batch = []
+        items.bulk_update(batch, ['rank', 'updated_at'])
+        publish(list_id, 'resync')
+
+
+_rebalancing = set()
+_rebalancing_lock = threading.Lock()
+
+
+def schedule_rebalance_if_needed(list_id, key, force=False):
+    """Rebalance a list in a background thread once `key` has grown too long"""
+    if len(key) <= REBALANCE_LENGTH and not force:
+        return
+
+    def run():
+        with _rebalancing_lock:
+            if list_id in _rebalancing:
+                return
+            _rebalancing.add(list_id)
+        try:
+            rebalance(list_id)
+        finally:
+            with _rebalancing_lock:
+                _rebalancing.discard(list_id)
+            connections.close_all()
+
+    transaction.on_commit(
+        lambda: threading.Thread(target=run, daemon=True).start(),
+        using=shard_for(list_id),
+    )
@@ -0,0 +1,52 @@
+"""
+Database routing for per-list grocery shards.
+
+Grocery lists themselves live in the default database. Each list's items
+and tombstones live in one of the SQLite files named by the GROCERY_SHARDS
+setting, picked by list id. Each file has its own write lock, so writes to
+lists on different shards no longer queue behind each other. With no shards
+configured, everything stays in the default database.
+
+Querysets cannot carry the list id to the router, so item queries go
+through GroceryItem.objects.for_list(list_id), which pins the shard.
+Saving or deleting an instance is routed by its list_id. Item ids come
+from one sequence in the default database (grocery.ids), since each shard's
+own AUTOINCREMENT would repeat the other shards' ids.
+"""
+
+from django.conf import settings
+
+SHARDS = list(getattr(settings, 'GROCERY_SHARDS', []))
+SHARDED_MODELS = {'groceryitem', 'groceryitemtombstone'}
+
+
+def shard_for(list_id):
+    """Return the database alias holding a list's items"""
+    if not SHARDS:
+        return 'default'
+    return SHARDS[list_id % len(SHARDS)]
+
+
+class GroceryShardRouter:
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def _db_for(self, model, hints):
+        if model._meta.app_label != 'grocery':
+            return None
+        if model._meta.model_name not in SHARDED_MODELS:
+            return 'default'
+        instance = hints.get('instance')
+        if instance is not None and getattr(instance, 'list_id', None) is not None:
+            return shard_for(instance.list_id)
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in SHARDS:
+            # Shards only hold item tables; everything else (including data
+            # migrations, which have no model_name) stays on default.
+            return app_label == 'grocery' and model_name in SHARDED_MODELS
+        return None
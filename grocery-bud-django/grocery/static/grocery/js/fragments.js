@@ -0,0 +1,85 @@
+// Progressive enhancement for the grocery list page. Forms and edit links
+// marked with data-fragment are sent with an X-Fragment header; the views
+// then answer with just the changed item or form, which is swapped in
+// place instead of following a redirect and re-rendering the whole list.
+// Without JavaScript the same forms post and redirect as before.
+
+function parseFragment(html) {
+  const template = document.createElement('template');
+  template.innerHTML = html.trim();
+  return template.content.firstElementChild;
+}
+
+async function fetchFragment(url, options = {}) {
+  const response = await fetch(url, {
+    ...options,
+    headers: { 'X-Fragment': '1' },
+    credentials: 'same-origin',
+  });
+  if (!response.ok && response.status !== 400) {
+    throw new Error(`${response.status} ${response.statusText}`);
+  }
+  return response.text();
+}
+
+function replaceForm(form, html) {
+  const replacement = parseFragment(html);
+  form.replaceWith(replacement);
+  const input = replacement.querySelector('input[name="name"]');
+  if (input && replacement.dataset.fragment === 'update') {
+    input.focus();
+  }
+}
+
+function resetForm(form) {
+  form.action = form.dataset.addUrl;
+  form.dataset.fragment = 'add';
+  form.querySelector('input[name="name"]').value = '';
+  form.querySelector('button[type="submit"]').textContent = 'add item';
+  form.querySelector('.alert')?.remove();
+}
+
+document.addEventListener('submit', async (event) => {
+  const form = event.target;
+  const kind = form.dataset.fragment;
+  if (!kind) return;
+  event.preventDefault();
+
+  let html;
+  try {
+    html = await fetchFragment(form.action, { method: 'POST', body: new FormData(form) });
+  } catch (error) {
+    form.submit();
+    return;
+  }
+
+  const item = form.closest('.single-item');
+  const items = document.querySelector('.items');
+  if (kind === 'toggle') {
+    item.replaceWith(parseFragment(html));
+  } else if (kind === 'delete') {
+    item.remove();
+  } else if (html.trim().startsWith('<form')) {
+    // Validation failed; the form comes back with its error message.
+    replaceForm(form, html);
+  } else if (kind === 'add') {
+    items.querySelector('.no-items')?.remove();
+    items.prepend(parseFragment(html));
+    resetForm(form);
+  } else if (kind === 'update') {
+    const updated = parseFragment(html);
+    items.querySelector(`.single-item[data-id="${updated.dataset.id}"]`)?.replaceWith(updated);
+    resetForm(form);
+  }
+});
+
+document.addEventListener('click', async (event) => {
+  const link = event.target.closest('a[data-fragment="edit"]');
+  if (!link) return;
+  event.preventDefault();
+  try {
+    replaceForm(document.querySelector('form[data-add-url]'), await fetchFragment(link.href));
+  } catch (error) {
+    window.location = link.href;
+  }
+});
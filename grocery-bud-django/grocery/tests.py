@@ -1,3 +1,403 @@
-from django.test import TestCase
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import api, ids, ranking, routers
+from .models import GroceryItem, GroceryItemQuerySet, GroceryItemTombstone, GroceryList
+from .writebehind import ToggleBuffer
+
+
+@override_settings(QUERY_BUDGETS_ENABLED=True)
+class IndexTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.grocery_list = GroceryList.objects.create(name='Weekly')
+        items = GroceryItem.objects.for_list(cls.grocery_list.id)
+        ranks = items.new_ranks(60)
+        GroceryItem.objects.using(items.db).bulk_create(
+            GroceryItem(list_id=cls.grocery_list.id, name=f'Item {n}', rank=rank)
+            for n, rank in enumerate(ranks)
+        )
+        cls.url = reverse('grocery:index', args=[cls.grocery_list.id])
+
+    def test_page_stays_within_query_budget(self):
+        first = GroceryItem.objects.for_list(self.grocery_list.id).first()
+        response = self.client.get(self.url)
+        self.assertContains(response, first.name)
+
+    def test_edit_mode_stays_within_query_budget(self):
+        item = GroceryItem.objects.for_list(self.grocery_list.id).first()
+        response = self.client.get(self.url, {'edit': item.id})
+        self.assertContains(response, item.name)
+
+
+class ToggleBufferTests(TestCase):
+    def setUp(self):
+        self.buffer = ToggleBuffer(flush_seconds=60)
+        self.addCleanup(self.buffer.flush)
+        self.item = GroceryItem.objects.for_list(1).create(list_id=1, name='milk')
+
+    def completed(self):
+        return GroceryItem.objects.for_list(1).get(id=self.item.id).completed
+
+    def test_even_clicks_cancel_out_without_writing(self):
+        self.buffer.add(1, self.item.id)
+        self.buffer.add(1, self.item.id)
+        self.assertEqual(self.buffer.pending_for(1), set())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertFalse(self.completed())
+        self.assertEqual(self.buffer.stats()['cancelled'], 2)
+
+    def test_odd_clicks_become_one_update(self):
+        for _ in range(3):
+            self.buffer.add(1, self.item.id)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(self.completed())
+        stats = self.buffer.stats()
+        self.assertEqual((stats['received'], stats['updates'], stats['collapsed']), (3, 1, 2))
+
+    def test_toggle_is_scoped_to_its_list(self):
+        self.buffer.add(2, self.item.id)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertFalse(self.completed())
+
+    def test_failed_flush_is_requeued(self):
+        self.buffer.add(1, self.item.id)
+        with mock.patch.object(GroceryItemQuerySet, 'toggle', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('grocery.writebehind', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending_for(1), {self.item.id})
+        self.assertEqual(self.buffer.stats()['failures'], 1)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(self.completed())
+
+    def test_click_during_failed_flush_cancels_the_requeued_flip(self):
+        self.buffer.add(1, self.item.id)
+
+        def locked_while_clicked(queryset):
+            self.buffer.add(1, self.item.id)
+            raise OperationalError('database is locked')
+
+        with mock.patch.object(GroceryItemQuerySet, 'toggle', locked_while_clicked):
+            with self.assertLogs('grocery.writebehind', 'ERROR'):
+                self.buffer.flush()
+        self.assertEqual(self.buffer.pending_for(1), set())
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertFalse(self.completed())
+
+
+SHARD_ALIASES = ['test_shard_0', 'test_shard_1', 'test_shard_2']
+
+
+class ShardedTestCase(TransactionTestCase):
+    """Runs with throwaway SQLite shards; `reshard(n)` changes their number"""
+    databases = {'default'}
+    # Keeps flush from running other apps' post_migrate handlers on shards
+    available_apps = ['grocery']
+    shard_count = 2
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Only now, or the test runner would look for them in DATABASES;
+        # listed, they are also flushed after each test
+        cls.databases = {'default', *SHARD_ALIASES}
+        cls.directory = tempfile.mkdtemp()
+        saved = list(routers.SHARDS)
+        routers.SHARDS[:] = SHARD_ALIASES
+        try:
+            for alias in SHARD_ALIASES:
+                connections.settings[alias] = connections.configure_settings({
+                    'default': {'ENGINE': 'django.db.backends.sqlite3'},
+                    alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': Path(cls.directory) / f'{alias}.sqlite3'},
+                })[alias]
+                call_command('migrate', 'grocery', database=alias, verbosity=0)
+        finally:
+            routers.SHARDS[:] = saved
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in SHARD_ALIASES:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls.directory)
+        cls.databases = {'default'}
+        super().tearDownClass()
+
+    def setUp(self):
+        saved = list(routers.SHARDS)
+        self.addCleanup(routers.SHARDS.__setitem__, slice(None), saved)
+        routers.SHARDS[:] = SHARD_ALIASES[:self.shard_count]
+        patcher = mock.patch.object(ids, 'allocator', ids.IdAllocator(block_size=5))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reshard(self, count):
+        routers.SHARDS[:] = SHARD_ALIASES[:count]
+        output = StringIO()
+        call_command('shard_grocery_items', stdout=output)
+        return output.getvalue()
+
+    def add_legacy_items(self, alias, list_id, item_ids):
+        # Rows as the shards numbered them before grocery.ids
+        GroceryItem.objects.using(alias).bulk_create(
+            GroceryItem(id=item_id, list_id=list_id, name=f'{list_id}-{item_id}', rank=f'a{item_id}')
+            for item_id in item_ids
+        )
+
+    def names(self, list_id):
+        return sorted(GroceryItem.objects.for_list(list_id).values_list('name', flat=True))
+
+    def all_ids(self):
+        return [
+            item_id
+            for alias in ['default', *routers.SHARDS]
+            for item_id in GroceryItem.objects.using(alias).values_list('id', flat=True)
+        ]
+
+
+class ShardIdTests(ShardedTestCase):
+    def test_new_items_get_ids_unique_across_shards(self):
+        self.add_legacy_items('test_shard_1', 1, [1, 2, 3])
+        GroceryItem.objects.for_list(2).create(list_id=2, name='one')
+        GroceryItem.objects.for_list(1).create(list_id=1, name='two')
+        GroceryItem.objects.for_list(2).bulk_create(GroceryItem(list_id=2, name=f'n{n}', rank=f'b{n}') for n in range(7))
+
+        item_ids = self.all_ids()
+        self.assertEqual(len(item_ids), len(set(item_ids)))
+        # The sequence starts above every id already used on any shard
+        self.assertGreater(min(set(item_ids) - {1, 2, 3}), 3)
+
+    def test_reshard_renumbers_ids_taken_in_the_target_shard(self):
+        # With two shards, lists 4 and 6 live on shard 0 and list 3 on
+        # shard 1, whose ids 4 and 5 clash with list 6's
+        self.add_legacy_items('test_shard_0', 4, [1, 2, 3])
+        self.add_legacy_items('test_shard_0', 6, [4, 5])
+        self.add_legacy_items('test_shard_1', 3, [4, 5, 6])
+        before = {list_id: self.names(list_id) for list_id in (3, 4, 6)}
+
+        # With three, list 3 moves onto shard 0 next to list 6
+        output = self.reshard(3)
+        self.assertIn('List 3: 2 item ids were taken in test_shard_0, renumbered', output)
+
+        self.assertEqual({list_id: self.names(list_id) for list_id in (3, 4, 6)}, before)
+        item_ids = self.all_ids()
+        self.assertEqual(len(item_ids), len(set(item_ids)))
+        # Clients drop the old ids of the renumbered items as deleted ones
+        self.assertEqual(
+            set(GroceryItemTombstone.objects.using('test_shard_0').filter(list_id=3).values_list('item_id', flat=True)),
+            {4, 5},
+        )
+        self.assertEqual(self.reshard(3), '')
+
+
+class ItemListApiTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.grocery_list = GroceryList.objects.create(name='Weekly')
+        GroceryItem.objects.for_list(self.grocery_list.id).create(list_id=self.grocery_list.id, name='milk')
+        self.url = reverse('grocery:api_items', args=[self.grocery_list.id])
+
+    def test_unchanged_list_answers_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['items'][0]['name'], 'milk')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_list_is_404_with_or_without_etag(self):
+        url = reverse('grocery:api_items', args=[self.grocery_list.id + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # "*" matches any current representation, so an unknown list that
+        # still got a fingerprint would answer 304
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+class BatchApiTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.grocery_list = GroceryList.objects.create(name='Weekly')
+        self.items = GroceryItem.objects.for_list(self.grocery_list.id)
+        self.milk = self.items.create(list_id=self.grocery_list.id, name='milk')
+        self.eggs = self.items.create(list_id=self.grocery_list.id, name='eggs')
+        self.url = reverse('grocery:api_batch', args=[self.grocery_list.id])
+
+    def post(self, operations):
+        return self.client.post(self.url, {'operations': operations}, content_type='application/json')
+
+    def test_results_follow_request_order(self):
+        response = self.post([
+            {'op': 'toggle', 'id': self.milk.id},
+            {'op': 'add', 'name': ' bread '},
+            {'op': 'rename', 'id': 999, 'name': 'ghost'},
+            {'op': 'delete', 'id': self.eggs.id},
+            {'op': 'add', 'name': ''},
+            {'op': 'shout'},
+            {'op': 'toggle', 'id': '1'},
+        ])
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['ok', 'ok', 'not_found', 'ok', 'invalid', 'invalid', 'invalid'])
+        self.assertEqual(results[1]['item']['name'], 'bread')
+        self.assertEqual(results[6]['error'], 'Missing item id')
+        self.assertEqual(set(self.items.values_list('name', 'completed')), {('milk', True), ('bread', False)})
+        self.assertTrue(GroceryItemTombstone.objects.filter(item_id=self.eggs.id).exists())
+
+    def test_repeated_operations_coalesce(self):
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.post([
+                {'op': 'toggle', 'id': self.milk.id},
+                {'op': 'toggle', 'id': self.eggs.id},
+                {'op': 'rename', 'id': self.milk.id, 'name': 'oat milk'},
+                {'op': 'toggle', 'id': self.eggs.id},
+                {'op': 'rename', 'id': self.milk.id, 'name': 'soy milk'},
+            ])
+        # One toggle and one rename; the two toggles of eggs cancel out
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['ok'] * 5)
+        self.assertEqual(self.items.get(id=self.milk.id).name, 'soy milk')
+        self.assertTrue(self.items.get(id=self.milk.id).completed)
+        self.assertFalse(self.items.get(id=self.eggs.id).completed)
+
+    def test_adds_go_on_top_newest_first(self):
+        self.post([{'op': 'add', 'name': 'first'}, {'op': 'add', 'name': 'second'}])
+        self.assertEqual(list(self.items.values_list('name', flat=True)[:2]), ['second', 'first'])
+
+    def test_add_to_unknown_list_is_404(self):
+        url = reverse('grocery:api_batch', args=[self.grocery_list.id + 1])
+        response = self.client.post(url, {'operations': [{'op': 'add', 'name': 'milk'}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_body_is_400(self):
+        response = self.client.post(self.url, 'nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class SyncApiTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.list_id = GroceryList.objects.create(name='Weekly').id
+        self.items = GroceryItem.objects.for_list(self.list_id)
+        self.milk = self.items.create(list_id=self.list_id, name='milk')
+        self.eggs = self.items.create(list_id=self.list_id, name='eggs')
+        self.url = reverse('grocery:api_sync', args=[self.list_id])
+
+    def sync(self, since=None):
+        return self.client.get(self.url, {'since': since} if since else {}).json()
+
+    def test_first_sync_is_a_full_snapshot(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual({item['name'] for item in data['items']}, {'milk', 'eggs'})
+        self.assertEqual(data['deleted'], [])
+
+    def test_delta_holds_changes_and_tombstones(self):
+        token = self.sync()['token']
+        # Writes land after the token, which trails the clock by SYNC_GRACE
+        later = timezone.now() + timedelta(seconds=5)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.items.filter(id=self.milk.id).toggle()
+            self.items.filter(id=self.eggs.id).delete()
+        data = self.sync(token)
+        self.assertFalse(data['full'])
+        self.assertEqual([(item['id'], item['completed']) for item in data['items']], [(self.milk.id, True)])
+        self.assertEqual(data['deleted'], [self.eggs.id])
+
+    def test_nothing_changed_is_an_empty_delta(self):
+        # Rows written within SYNC_GRACE of a token are sent again, so
+        # take the token well after the writes
+        later = timezone.now() + timedelta(seconds=5)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            token = self.sync()['token']
+        data = self.sync(token)
+        self.assertEqual((data['full'], data['items'], data['deleted']), (False, [], []))
+
+    def test_expired_or_malformed_token_falls_back_to_a_full_snapshot(self):
+        expired = api.encode_sync_token(timezone.now() - api.TOMBSTONE_RETENTION - timedelta(days=1))
+        naive = api.encode_sync_token(timezone.now().replace(tzinfo=None))
+        for token in (expired, naive, 'not a token'):
+            data = self.sync(token)
+            self.assertTrue(data['full'], token)
+            self.assertEqual(len(data['items']), 2)
+
+
+class RankingTests(SimpleTestCase):
+    def test_key_between_sorts_strictly_between(self):
+        keys = [ranking.key_between(None, None)]
+        rng = random.Random(4)
+        for _ in range(500):
+            index = rng.randint(0, len(keys))
+            lower = keys[index - 1] if index else None
+            upper = keys[index] if index < len(keys) else None
+            keys.insert(index, ranking.key_between(lower, upper))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_inserting_at_the_ends_keeps_keys_short(self):
+        top = bottom = ranking.key_between(None, None)
+        for _ in range(5000):
+            top = ranking.key_between(None, top)
+            bottom = ranking.key_between(bottom, None)
+        self.assertLessEqual(max(len(top), len(bottom)), 4)
+
+    def test_keys_before(self):
+        keys = ranking.keys_before('a0', 3)
+        self.assertEqual(keys, sorted(keys))
+        self.assertLess(keys[-1], 'a0')
+
+    def test_out_of_order_or_malformed_keys_are_rejected(self):
+        for lower, upper in (('a1', 'a0'), ('a0', 'a0'), ('a10', None), ('a', None)):
+            with self.assertRaises(ValueError):
+                ranking.key_between(lower, upper)
+
+
+class RebalanceTests(TestCase):
+    databases = '__all__'
+
+    def test_rebalance_shortens_keys_and_keeps_the_order(self):
+        list_id = GroceryList.objects.create(name='Weekly').id
+        items = GroceryItem.objects.for_list(list_id)
+        # Repeatedly splitting the same gap lengthens the keys
+        lower, upper = 'a0', 'a1'
+        items.create(list_id=list_id, name='first', rank=lower)
+        items.create(list_id=list_id, name='last', rank=upper)
+        for n in range(150):
+            upper = ranking.key_between(lower, upper)
+            items.create(list_id=list_id, name=f'middle {n}', rank=upper)
+        self.assertGreater(len(upper), ranking.REBALANCE_LENGTH)
+        order = list(items.values_list('name', flat=True))
+
+        before = timezone.now()
+        ranking.rebalance(list_id)
+        self.assertEqual(list(items.values_list('name', flat=True)), order)
+        self.assertLessEqual(max(len(rank) for rank in items.values_list('rank', flat=True)), 3)
+        self.assertFalse(items.filter(updated_at__lt=before).exists())
+
+    def test_long_key_schedules_a_rebalance(self):
+        with mock.patch('grocery.ranking.threading.Thread') as thread:
+            with self.captureOnCommitCallbacks(execute=True):
+                ranking.schedule_rebalance_if_needed(1, 'a0')
+            thread.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                ranking.schedule_rebalance_if_needed(1, 'a0' + '1' * ranking.REBALANCE_LENGTH)
+            thread.return_value.start.assert_called_once()
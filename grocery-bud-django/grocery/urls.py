@@ -1,13 +1,23 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from . import api, views
 
 app_name = 'grocery'
 
-urlpatterns = [
+list_patterns = [
     path('', views.index, name='index'),
     path('toggle/<int:item_id>/', views.toggle_completed, name='toggle'),
     path('delete/<int:item_id>/', views.delete_item, name='delete'),
     path('add/', views.add_item, name='add'),
     path('edit/<int:item_id>/', views.edit_item, name='edit'),
     path('update/<int:item_id>/', views.update_item, name='update'),
-]
\ No newline at end of file
+    path('api/items/', api.item_list, name='api_items'),
+    path('api/items/batch/', api.batch, name='api_batch'),
+    path('api/items/stream/', api.stream, name='api_stream'),
+    path('api/items/sync/', api.sync, name='api_sync'),
+    path('api/items/<int:item_id>/move/', api.move, name='api_move'),
+]
+
+urlpatterns = [
+    path('', views.home, name='home'),
+    path('lists/<int:list_id>/', include(list_patterns)),
+]
@@ -1,76 +1,172 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from .models import GroceryItem
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from .api import serialize_item
+from .events import publish
+from .models import GroceryItem, GroceryList
+from .pagination import KeysetPaginator
+from .querybudget import query_budget
+from .writebehind import MODE as TOGGLE_MODE, toggle_buffer
 
 
-def index(request):
-    """Display all grocery items and handle edit mode"""
-    items = GroceryItem.objects.all()
-    edit_id = request.GET.get('edit')
-    edit_item = None
+def wants_fragment(request):
+    """Whether the client asked for an HTML fragment instead of a redirect"""
+    return request.headers.get('X-Fragment') == '1' or request.GET.get('fragment') == '1'
 
-    if edit_id:
-        edit_item = get_object_or_404(GroceryItem, id=edit_id)
 
+def show_pending_toggles(list_id, items):
+    """Show toggles still waiting in the write-behind buffer as applied"""
+    if TOGGLE_MODE != 'buffered':
+        return
+    pending = toggle_buffer.pending_for(list_id)
+    for item in items:
+        if item.id in pending:
+            item.completed = not item.completed
+
+
+def render_item(request, item):
+    return render(request, 'grocery/_item.html', {'item': item})
+
+
+def render_form(request, list_id, edit_item=None, error=None):
     context = {
-        'items': items,
+        'grocery_list': get_object_or_404(GroceryList, id=list_id),
         'edit_item': edit_item,
+        'error': error,
     }
-    return render(request, 'grocery/index.html', context)
+    return render(request, 'grocery/_form.html', context, status=400 if error else 200)
 
 
-def toggle_completed(request, item_id):
-    """Toggle the completed status of a grocery item"""
+def home(request):
+    """List all grocery lists and handle creating a new one"""
     if request.method == 'POST':
-        item = get_object_or_404(GroceryItem, id=item_id)
-        item.completed = not item.completed
-        item.save()
+        name = request.POST.get('name', '').strip()
 
-    return redirect('grocery:index')
+        if not name:
+            messages.error(request, 'Please provide a value')
+            return redirect('grocery:home')
+
+        grocery_list = GroceryList.objects.create(name=name)
+        messages.success(request, 'List Created Successfully!')
+        return redirect('grocery:index', list_id=grocery_list.id)
+
+    lists = GroceryList.objects.all()
+    return render(request, 'grocery/lists.html', {'lists': lists})
+
+
+# The list, the page, the item being edited and a session read for messages
+@query_budget(4)
+def index(request, list_id):
+    """Display one page of a list's grocery items and handle edit mode"""
+    grocery_list = get_object_or_404(GroceryList, id=list_id)
+    items = GroceryItem.objects.for_list(list_id)
+    page = KeysetPaginator(items, 'rank', descending=False).page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    edit_id = request.GET.get('edit')
+    edit_item = None
 
+    if edit_id:
+        edit_item = get_object_or_404(items, id=edit_id)
 
-def edit_item(request, item_id):
-    """Redirect to index with edit parameter"""
-    return redirect(f"/?edit={item_id}")
+    show_pending_toggles(list_id, page.items)
+
+    context = {
+        'grocery_list': grocery_list,
+        'items': page.items,
+        'page': page,
+        'edit_item': edit_item,
+    }
+    return render(request, 'grocery/index.html', context)
 
 
-def add_item(request):
+def toggle_completed(request, list_id, item_id):
+    """Toggle the completed status of a grocery item"""
+    if request.method == 'POST':
+        item = GroceryItem.objects.for_list(list_id).filter(id=item_id)
+        if TOGGLE_MODE == 'buffered':
+            # Coalesce with other clicks; written at the next flush
+            if not item.exists():
+                raise Http404('No GroceryItem matches the given query.')
+            toggle_buffer.add(list_id, item_id)
+        else:
+            # Flip in the database so concurrent clicks never lose an update
+            if not item.toggle():
+                raise Http404('No GroceryItem matches the given query.')
+            publish(list_id, 'toggle', id=item_id)
+
+        if wants_fragment(request):
+            item = get_object_or_404(GroceryItem.objects.for_list(list_id), id=item_id)
+            show_pending_toggles(list_id, [item])
+            return render_item(request, item)
+
+    return redirect('grocery:index', list_id=list_id)
+
+
+def edit_item(request, list_id, item_id):
+    """Return the edit form, or redirect to index with edit parameter"""
+    if wants_fragment(request):
+        item = get_object_or_404(GroceryItem.objects.for_list(list_id), id=item_id)
+        return render_form(request, list_id, edit_item=item)
+    return redirect(f"{reverse('grocery:index', args=[list_id])}?edit={item_id}")
+
+
+def add_item(request, list_id):
     """Add a new grocery item"""
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
 
         if not name:
+            if wants_fragment(request):
+                return render_form(request, list_id, error='Please provide a value')
             messages.error(request, 'Please provide a value')
-            return redirect('grocery:index')
+            return redirect('grocery:index', list_id=list_id)
 
-        GroceryItem.objects.create(name=name)
+        get_object_or_404(GroceryList, id=list_id)
+        item = GroceryItem.objects.for_list(list_id).create(list_id=list_id, name=name)
+        publish(list_id, 'add', item=serialize_item(item))
+        if wants_fragment(request):
+            return render_item(request, item)
         messages.success(request, 'Item Added Successfully!')
 
-    return redirect('grocery:index')
+    return redirect('grocery:index', list_id=list_id)
 
 
-def update_item(request, item_id):
+def update_item(request, list_id, item_id):
     """Update an existing grocery item name"""
     if request.method == 'POST':
-        item = get_object_or_404(GroceryItem, id=item_id)
         name = request.POST.get('name', '').strip()
 
         if not name:
+            if wants_fragment(request):
+                item = get_object_or_404(GroceryItem.objects.for_list(list_id), id=item_id)
+                return render_form(request, list_id, edit_item=item, error='Please provide a value')
             messages.error(request, 'Please provide a value')
-            return redirect('grocery:index')
-
-        item.name = name
-        item.save()
+            return redirect('grocery:index', list_id=list_id)
+
+        items = GroceryItem.objects.for_list(list_id)
+        if not items.rename({item_id: name}):
+            raise Http404('No GroceryItem matches the given query.')
+        publish(list_id, 'update', id=item_id, name=name)
+        if wants_fragment(request):
+            item = items.get(id=item_id)
+            show_pending_toggles(list_id, [item])
+            return render_item(request, item)
         messages.success(request, 'Item Updated Successfully!')
 
-    return redirect('grocery:index')
+    return redirect('grocery:index', list_id=list_id)
 
 
-def delete_item(request, item_id):
+def delete_item(request, list_id, item_id):
     """Delete a grocery item"""
     if request.method == 'POST':
-        item = get_object_or_404(GroceryItem, id=item_id)
+        item = get_object_or_404(GroceryItem.objects.for_list(list_id), id=item_id)
         item.delete()
+        publish(list_id, 'delete', id=item_id)
+        if wants_fragment(request):
+            return HttpResponse('')
         messages.success(request, 'Item Deleted Successfully!')
 
-    return redirect('grocery:index')
+    return redirect('grocery:index', list_id=list_id)
@@ -0,0 +1,141 @@
+"""
+Write-behind buffer for toggling grocery items.
+
+Checkbox forms submit on every change, so a double click sends two toggle
+POSTs and, without buffering, two write transactions that cancel out. In
+'buffered' mode, `toggle_completed` records the click here and returns at
+once. Clicks on the same item within GROCERY_TOGGLE_FLUSH_SECONDS coalesce
+by parity: an even number cancels out and writes nothing. An odd number
+becomes one flip, and each flush applies all of a list's flips in a single
+UPDATE, scoped to that list like the write-through path. Flips commute, so the final state is the same as applying each
+click as it arrived, whatever other writes happen in between.
+
+Durability: a buffered toggle is acknowledged before it is written. Pending
+flips are flushed when the window closes and when the process exits
+normally, but a crash (or SIGKILL) inside the window loses them. A flush
+whose UPDATE fails (say, the database is locked) is logged and its flips go
+back into the buffer for the next window. The
+default 'write-through' mode writes every toggle before responding, as
+before. Buffers are per process, so each worker has its own.
+"""
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .events import publish
+from .models import GroceryItem
+
+MODE = getattr(settings, 'GROCERY_TOGGLE_MODE', 'write-through')
+FLUSH_SECONDS = getattr(settings, 'GROCERY_TOGGLE_FLUSH_SECONDS', 0.5)
+
+logger = logging.getLogger('grocery.writebehind')
+
+
+class ToggleBuffer:
+    def __init__(self, flush_seconds=FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._pending = {}  # (list_id, item_id) -> True while a flip is owed
+        self._timer = None
+        self.received = 0   # toggles recorded
+        self.cancelled = 0  # toggles undone by a later click before a flush
+        self.updates = 0    # UPDATE statements issued by flushes
+        self.written = 0    # rows those statements flipped
+        self.failures = 0   # UPDATE statements that raised; their flips were requeued
+
+    def add(self, list_id, item_id):
+        """Record one toggle, to be written at the next flush"""
+        key = (list_id, item_id)
+        with self._lock:
+            self.received += 1
+            if self._pending.pop(key, False):
+                # The second click undoes the first; neither needs writing.
+                self.cancelled += 2
+            else:
+                self._pending[key] = True
+            self._arm_timer()
+
+    def pending_for(self, list_id):
+        """Return the ids of a list's items with a flip not yet written"""
+        with self._lock:
+            return {item_id for (owner, item_id) in self._pending if owner == list_id}
+
+    def flush(self):
+        """Write every pending flip, one UPDATE per list"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        by_list = defaultdict(list)
+        for list_id, item_id in pending:
+            by_list[list_id].append(item_id)
+
+        written = updates = 0
+        for list_id, item_ids in by_list.items():
+            try:
+                written += GroceryItem.objects.for_list(list_id).filter(id__in=item_ids).toggle()
+            except DatabaseError:
+                logger.exception('Flushing %d toggles of list %s failed; retrying at the next flush',
+                                 len(item_ids), list_id)
+                self._requeue([(list_id, item_id) for item_id in item_ids])
+                continue
+            updates += 1
+            for item_id in item_ids:
+                publish(list_id, 'toggle', id=item_id)
+
+        with self._lock:
+            self.updates += updates
+            self.written += written
+        return written
+
+    def _requeue(self, keys):
+        """Put back flips whose UPDATE failed, merging them with clicks since"""
+        with self._lock:
+            self.failures += 1
+            for key in keys:
+                if self._pending.pop(key, False):
+                    # A click after the swap already undid this flip.
+                    self.cancelled += 2
+                else:
+                    self._pending[key] = True
+            self._arm_timer()
+
+    def _arm_timer(self):
+        # Called with the lock held
+        if self._timer is None and self._pending:
+            self._timer = threading.Timer(self.flush_seconds, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stats(self):
+        """Counters since start; `collapsed` is toggles that needed no write of their own"""
+        with self._lock:
+            pending = len(self._pending)
+            return {
+                'received': self.received,
+                'pending': pending,
+                'cancelled': self.cancelled,
+                'updates': self.updates,
+                'written': self.written,
+                'failures': self.failures,
+                'collapsed': self.received - pending - self.updates,
+            }
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+toggle_buffer = ToggleBuffer()
+atexit.register(toggle_buffer.flush)